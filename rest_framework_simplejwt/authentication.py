@@ -1,16 +1,22 @@
-from typing import Optional, TypeVar
+from copy import copy, deepcopy
+from typing import Any, Optional, TypeVar
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AbstractBaseUser
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
 from django.utils.translation import gettext_lazy as _
 from rest_framework import HTTP_HEADER_ENCODING, authentication
 from rest_framework.request import Request
 
+from .backends import TokenBackend
+from .cache import LRUCache, UserCache
 from .exceptions import AuthenticationFailed, InvalidToken, TokenError
 from .models import TokenUser
 from .settings import api_settings
+from .token_blacklist.epochs import ais_token_revoked, is_token_revoked
 from .tokens import Token
-from .utils import get_md5_hash_password
+from .utils import aware_utcnow, get_md5_hash_password
 
 AUTH_HEADER_TYPES = api_settings.AUTH_HEADER_TYPES
 
@@ -23,6 +29,68 @@ AUTH_HEADER_TYPE_BYTES: set[bytes] = {
 
 AuthUser = TypeVar("AuthUser", AbstractBaseUser, TokenUser)
 
+_token_cache: LRUCache | None = None
+
+
+def get_token_cache() -> LRUCache | None:
+    """
+    Returns the process-wide cache of validated tokens or `None` if it has
+    been disabled through the `AUTH_TOKEN_CACHE_SIZE` setting.
+    """
+    global _token_cache
+
+    maxsize = api_settings.AUTH_TOKEN_CACHE_SIZE
+    if not maxsize:
+        return None
+
+    if _token_cache is None or _token_cache.maxsize != maxsize:
+        _token_cache = LRUCache(maxsize)
+
+    return _token_cache
+
+
+_user_cache: UserCache | None = None
+
+
+def get_user_cache() -> UserCache | None:
+    """
+    Returns the cache of users looked up by `JWTAuthentication` or `None` if
+    it has been disabled through the `USER_CACHE_TIMEOUT` setting.
+    """
+    global _user_cache
+
+    timeout = api_settings.USER_CACHE_TIMEOUT
+    if timeout is None:
+        return None
+
+    if (
+        _user_cache is None
+        or _user_cache.timeout != timeout
+        or _user_cache.alias != api_settings.USER_CACHE_ALIAS
+        or _user_cache.maxsize != api_settings.USER_CACHE_SIZE
+    ):
+        _user_cache = UserCache(
+            timeout, api_settings.USER_CACHE_ALIAS, api_settings.USER_CACHE_SIZE
+        )
+
+        user_model = get_user_model()
+        for signal in (post_save, post_delete):
+            signal.connect(
+                invalidate_cached_user,
+                sender=user_model,
+                dispatch_uid="rest_framework_simplejwt.invalidate_cached_user",
+            )
+
+    return _user_cache
+
+
+def invalidate_cached_user(sender: type, instance: AbstractBaseUser, **kwargs) -> None:
+    """
+    Drops a saved or deleted user from the user cache.
+    """
+    if _user_cache is not None:
+        _user_cache.delete(getattr(instance, api_settings.USER_ID_FIELD))
+
 
 class JWTAuthentication(authentication.BaseAuthentication):
     """
@@ -35,6 +103,7 @@ class JWTAuthentication(authentication.BaseAuthentication):
 
     default_error_messages = {
         "password_changed": _("The user's password has been changed."),
+        "token_revoked": _("The user's tokens have been revoked."),
     }
 
     def __init__(self, *args, **kwargs) -> None:
@@ -51,6 +120,7 @@ class JWTAuthentication(authentication.BaseAuthentication):
             return None
 
         validated_token = self.get_validated_token(raw_token)
+        self.check_token_epoch(validated_token)
 
         return self.get_user(validated_token), validated_token
 
@@ -101,10 +171,21 @@ class JWTAuthentication(authentication.BaseAuthentication):
         Validates an encoded JSON web token and returns a validated token
         wrapper object.
         """
+        token_cache = get_token_cache()
+        if token_cache is not None:
+            cached_token = token_cache.get(raw_token)
+            if cached_token is not None:
+                try:
+                    return self.reverify_token(cached_token)
+                except TokenError:
+                    token_cache.delete(raw_token)
+
+        # The token is decoded once for all the token classes sharing a backend
+        decoded: dict[TokenBackend, Any] = {}
         messages = []
         for AuthToken in api_settings.AUTH_TOKEN_CLASSES:
             try:
-                return AuthToken(raw_token)
+                validated_token = AuthToken.from_token(raw_token, decoded)
             except TokenError as e:
                 messages.append(
                     {
@@ -113,32 +194,122 @@ class JWTAuthentication(authentication.BaseAuthentication):
                         "message": e.args[0],
                     }
                 )
+            else:
+                self.cache_token(token_cache, raw_token, validated_token)
+
+                return validated_token
+
+        raise self.invalid_token(messages)
+
+    def cache_token(
+        self, token_cache: LRUCache | None, raw_token: bytes, validated_token: Token
+    ) -> None:
+        """
+        Stores a copy of a validated token in the token cache, if enabled,
+        until it expires.  The token returned to the view is not cached, so
+        changes made to it while handling the request don't leak into later
+        requests.
+        """
+        exp = validated_token.get("exp")
+        if token_cache is not None and exp is not None:
+            token_cache.set(raw_token, self.copy_token(validated_token), exp)
 
-        raise InvalidToken(
+    def check_token_epoch(self, validated_token: Token) -> None:
+        """
+        Raises `AuthenticationFailed` if the `CHECK_TOKEN_EPOCH` setting is
+        enabled and the given validated token was issued before the tokens of
+        its user were revoked.
+        """
+        if api_settings.CHECK_TOKEN_EPOCH and is_token_revoked(validated_token):
+            raise self.token_revoked()
+
+    def token_revoked(self) -> AuthenticationFailed:
+        return AuthenticationFailed(
+            self.default_error_messages["token_revoked"], code="token_revoked"
+        )
+
+    def invalid_token(self, messages: list[dict[str, Any]]) -> InvalidToken:
+        """
+        Returns the error raised when a token is not valid for any of the
+        `AUTH_TOKEN_CLASSES`.
+        """
+        return InvalidToken(
             {
                 "detail": _("Given token not valid for any token type"),
                 "messages": messages,
             }
         )
 
+    def reverify_token(self, token: Token) -> Token:
+        """
+        Returns a copy of a previously validated token after re-running the
+        claim checks which depend on the current time or on external state.
+        The signature is not checked again.
+        """
+        token = self.copy_token(token)
+        token.verify()
+
+        return token
+
+    def copy_token(self, token: Token) -> Token:
+        """
+        Returns a copy of the given token, with its own payload, including
+        nested claims, checked against the current time.
+        """
+        token = copy(token)
+        token.payload = deepcopy(token.payload)
+        token.current_time = aware_utcnow()
+
+        return token
+
     def get_user(self, validated_token: Token) -> AuthUser:
         """
         Attempts to find and return a user using the given validated token.
         """
+        user_id = self.get_user_id(validated_token)
+
+        user_cache = get_user_cache()
+        user = user_cache.get(user_id) if user_cache is not None else None
+        if user is None:
+            try:
+                user = self.get_user_queryset().get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(
+                    _("User not found"), code="user_not_found"
+                ) from e
+
+            if user_cache is not None:
+                user_cache.set(user_id, user)
+
+        self.check_user(user, validated_token)
+
+        return user
+
+    def get_user_queryset(self) -> QuerySet:
+        """
+        Returns the queryset users are looked up in, given by the
+        `USER_QUERYSET` setting.
+        """
+        return api_settings.USER_QUERYSET()
+
+    def get_user_id(self, validated_token: Token) -> Any:
+        """
+        Returns the user identifier claim of the given validated token.
+        """
         try:
-            user_id = validated_token[api_settings.USER_ID_CLAIM]
+            return validated_token[api_settings.USER_ID_CLAIM]
         except KeyError as e:
             raise InvalidToken(
                 _("Token contained no recognizable user identification")
             ) from e
 
-        try:
-            user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
-        except self.user_model.DoesNotExist as e:
-            raise AuthenticationFailed(
-                _("User not found"), code="user_not_found"
-            ) from e
-
+    def check_user(self, user: AuthUser, validated_token: Token) -> None:
+        """
+        Raises `AuthenticationFailed` if the given user may no longer
+        authenticate with the given validated token.
+        """
         if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
             raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
 
@@ -151,6 +322,100 @@ class JWTAuthentication(authentication.BaseAuthentication):
                     code="password_changed",
                 )
 
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """
+    A variant of `JWTAuthentication` with async counterparts of the methods
+    which may query the database, for authenticating requests from async
+    views and middleware without blocking the event loop.
+    """
+
+    async def aauthenticate(self, request: Request) -> tuple[AuthUser, Token] | None:
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = await self.aget_validated_token(raw_token)
+        await self.acheck_token_epoch(validated_token)
+
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_validated_token(self, raw_token: bytes) -> Token:
+        """
+        Async counterpart of `get_validated_token`.
+        """
+        token_cache = get_token_cache()
+        if token_cache is not None:
+            cached_token = token_cache.get(raw_token)
+            if cached_token is not None:
+                try:
+                    return await self.areverify_token(cached_token)
+                except TokenError:
+                    token_cache.delete(raw_token)
+
+        decoded: dict[TokenBackend, Any] = {}
+        messages = []
+        for AuthToken in api_settings.AUTH_TOKEN_CLASSES:
+            try:
+                validated_token = await AuthToken.afrom_token(raw_token, decoded)
+            except TokenError as e:
+                messages.append(
+                    {
+                        "token_class": AuthToken.__name__,
+                        "token_type": AuthToken.token_type,
+                        "message": e.args[0],
+                    }
+                )
+            else:
+                self.cache_token(token_cache, raw_token, validated_token)
+
+                return validated_token
+
+        raise self.invalid_token(messages)
+
+    async def acheck_token_epoch(self, validated_token: Token) -> None:
+        """
+        Async counterpart of `check_token_epoch`.
+        """
+        if api_settings.CHECK_TOKEN_EPOCH and await ais_token_revoked(validated_token):
+            raise self.token_revoked()
+
+    async def areverify_token(self, token: Token) -> Token:
+        """
+        Async counterpart of `reverify_token`.
+        """
+        token = self.copy_token(token)
+        await token.averify()
+
+        return token
+
+    async def aget_user(self, validated_token: Token) -> AuthUser:
+        """
+        Async counterpart of `get_user`.
+        """
+        user_id = self.get_user_id(validated_token)
+
+        user_cache = get_user_cache()
+        user = await user_cache.aget(user_id) if user_cache is not None else None
+        if user is None:
+            try:
+                user = await self.get_user_queryset().aget(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(
+                    _("User not found"), code="user_not_found"
+                ) from e
+
+            if user_cache is not None:
+                await user_cache.aset(user_id, user)
+
+        self.check_user(user, validated_token)
+
         return user
 
 
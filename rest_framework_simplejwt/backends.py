@@ -1,4 +1,8 @@
+import base64
+import hashlib
+import hmac
 import json
+import time
 from collections.abc import Iterable
 from datetime import timedelta
 from functools import cached_property
@@ -7,12 +11,14 @@ from typing import Any, Optional, Union
 import jwt
 from django.utils.translation import gettext_lazy as _
 from jwt import (
+    DecodeError,
     ExpiredSignatureError,
     InvalidAlgorithmError,
     InvalidTokenError,
     algorithms,
 )
 
+from .codecs import JSONCodec
 from .exceptions import TokenBackendError, TokenBackendExpiredToken
 from .tokens import Token
 from .utils import format_lazy
@@ -20,6 +26,8 @@ from .utils import format_lazy
 try:
     from jwt import PyJWKClient, PyJWKClientError
 
+    from .jwks import JWKSKeyManager
+
     JWK_CLIENT_AVAILABLE = True
 except ImportError:
     JWK_CLIENT_AVAILABLE = False
@@ -37,6 +45,191 @@ ALLOWED_ALGORITHMS = {
 }.union(algorithms.requires_cryptography)
 
 
+class KeyringKey:
+    """
+    A key of the `KEYRING` setting.  Its prepared forms are computed once and
+    cached.
+    """
+
+    def __init__(
+        self,
+        kid: str | None,
+        algorithm: str,
+        signing_key: str | None = None,
+        verifying_key: str | None = None,
+        active: bool = False,
+    ) -> None:
+        self.kid = kid
+        self.algorithm = algorithm
+        self.algorithms = [algorithm]
+        self.signing_key = signing_key
+        # Symmetric keys verify with the key they sign with
+        if verifying_key is None and algorithm.startswith("HS"):
+            verifying_key = signing_key
+        self.verifying_key = verifying_key
+        self.active = active
+
+    @cached_property
+    def prepared_signing_key(self) -> Any:
+        return prepare_key(self.signing_key, self.algorithm)
+
+    @cached_property
+    def prepared_verifying_key(self) -> Any:
+        return prepare_key(self.verifying_key, self.algorithm)
+
+
+class HMACVerifier:
+    """
+    Decodes HMAC signed tokens in the exact form `TokenBackend.encode` gives
+    them without going through PyJWT's generic header parsing, algorithm
+    lookup and claim validation.
+
+    `decode` returns None for any other token, and for any token that fails
+    verification, so that PyJWT decides what is wrong with it.
+    """
+
+    digests = {
+        "HS256": hashlib.sha256,
+        "HS384": hashlib.sha384,
+        "HS512": hashlib.sha512,
+    }
+    base64url_alphabet = (
+        b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+    )
+
+    def __init__(
+        self, key: bytes, algorithm: str, json_codec: JSONCodec | None = None
+    ) -> None:
+        self.json_codec = json_codec or JSONCodec()
+        # Copying a keyed hmac object skips hashing the key on every token
+        self.hmac = hmac.new(key, digestmod=self.digests[algorithm])
+        # PyJWT 2 sorts the header keys, PyJWT 1.7.1 puts "typ" first
+        self.header_segments = {
+            base64.urlsafe_b64encode(
+                json.dumps(header, separators=(",", ":")).encode()
+            ).rstrip(b"=")
+            for header in (
+                {"alg": algorithm, "typ": "JWT"},
+                {"typ": "JWT", "alg": algorithm},
+            )
+        }
+
+    def decode(self, token: Token, leeway: float) -> dict[str, Any] | None:
+        if isinstance(token, str):
+            try:
+                token = token.encode()
+            except UnicodeError:
+                return None
+
+        if not isinstance(token, bytes) or token.count(b".") != 2:
+            return None
+
+        signing_input, _, signature = token.rpartition(b".")
+        header_segment, _, payload_segment = signing_input.partition(b".")
+        if header_segment not in self.header_segments:
+            return None
+
+        mac = self.hmac.copy()
+        mac.update(signing_input)
+        expected = base64.urlsafe_b64encode(mac.digest()).rstrip(b"=")
+        if not hmac.compare_digest(expected, signature):
+            return None
+
+        # Rejects what PyJWT rejects, though base64 would skip the junk
+        if (
+            payload_segment.translate(None, self.base64url_alphabet)
+            or len(payload_segment) % 4 == 1
+        ):
+            return None
+
+        try:
+            payload = self.json_codec.loads(
+                base64.urlsafe_b64decode(
+                    payload_segment + b"=" * (-len(payload_segment) % 4)
+                )
+            )
+        except (ValueError, RecursionError):
+            return None
+
+        if not isinstance(payload, dict) or not self.validate_claims(payload, leeway):
+            return None
+
+        return payload
+
+    def validate_claims(self, payload: dict[str, Any], leeway: float) -> bool:
+        """
+        Mirrors PyJWT's checks of the registered claims when no audience or
+        issuer is expected.  Only integer timestamps are handled here.
+        """
+        now = time.time()
+
+        if "exp" in payload:
+            exp = payload["exp"]
+            if type(exp) is not int or exp <= now - leeway:
+                return False
+
+        for claim in ("iat", "nbf"):
+            if claim in payload:
+                value = payload[claim]
+                if type(value) is not int or value > now + leeway:
+                    return False
+
+        for claim in ("sub", "jti"):
+            if claim in payload and not isinstance(payload[claim], str):
+                return False
+
+        return True
+
+
+class CodecPyJWT(jwt.PyJWT):
+    """
+    A `PyJWT` which serializes and deserializes payloads with the given JSON
+    codec.  Relies on hooks which only exist as of PyJWT 2.
+    """
+
+    def __init__(
+        self, json_codec: JSONCodec, options: dict[str, Any] | None = None
+    ) -> None:
+        if not hasattr(jwt.PyJWT, "_decode_payload"):
+            raise TokenBackendError(
+                format_lazy(
+                    _("You must have PyJWT 2 or newer installed to use {}."),
+                    type(json_codec).__name__,
+                )
+            )
+
+        super().__init__(options=options)
+        self.json_codec = json_codec
+
+    def _encode_payload(
+        self,
+        payload: dict[str, Any],
+        headers: dict[str, Any] | None = None,
+        json_encoder: type[json.JSONEncoder] | None = None,
+    ) -> bytes:
+        return self.json_codec.dumps(payload)
+
+    def _decode_payload(self, decoded: dict[str, Any]) -> dict[str, Any]:
+        try:
+            payload = self.json_codec.loads(decoded["payload"])
+        except (ValueError, RecursionError) as e:
+            raise DecodeError(f"Invalid payload string: {e}") from e
+        if not isinstance(payload, dict):
+            raise DecodeError("Invalid payload string: must be a json object")
+        return payload
+
+
+_pyjws = jwt.PyJWS()
+
+
+def prepare_key(key: str | None, algorithm: str) -> Any:
+    # Support for PyJWT 1.7.1 or empty signing key
+    if key is None or not getattr(jwt.PyJWS, "get_algorithm_by_name", None):
+        return key
+    jws_alg = _pyjws.get_algorithm_by_name(algorithm)
+    return jws_alg.prepare_key(key)
+
+
 class TokenBackend:
     def __init__(
         self,
@@ -48,7 +241,19 @@ class TokenBackend:
         jwk_url: str | None = None,
         leeway: float | int | timedelta | None = None,
         json_encoder: type[json.JSONEncoder] | None = None,
+        jwk_refresh_interval: timedelta = timedelta(minutes=5),
+        keyring: Iterable[dict[str, Any]] | None = None,
+        fast_hmac: bool = True,
+        json_codec: type[JSONCodec] | None = None,
     ) -> None:
+        self.keyring: dict[str | None, KeyringKey] | None = None
+        self.active_key: KeyringKey | None = None
+        if keyring:
+            active_key = self._load_keyring(keyring)
+            algorithm = active_key.algorithm
+            signing_key = active_key.signing_key
+            verifying_key = active_key.verifying_key or ""
+
         self._validate_algorithm(algorithm)
 
         self.algorithm = algorithm
@@ -58,12 +263,41 @@ class TokenBackend:
         self.issuer = issuer
 
         if JWK_CLIENT_AVAILABLE:
-            self.jwks_client = PyJWKClient(jwk_url) if jwk_url else None
+            self.jwks_client = (
+                JWKSKeyManager(jwk_url, jwk_refresh_interval) if jwk_url else None
+            )
         else:
             self.jwks_client = None
 
         self.leeway = leeway
         self.json_encoder = json_encoder
+        self.json_codec = (json_codec or JSONCodec)(json_encoder)
+        self.fast_hmac = fast_hmac
+
+        # Everything decode() passes to PyJWT is prepared once.  With its
+        # options given at construction, PyJWT doesn't merge them on each call.
+        # The default codec produces what PyJWT itself does, so PyJWT is only
+        # subclassed for other codecs.
+        self._algorithms = [algorithm]
+        options = {"verify_aud": audience is not None}
+        if type(self.json_codec) is JSONCodec:
+            self._jwt = jwt.PyJWT(options=options)
+        else:
+            self._jwt = CodecPyJWT(self.json_codec, options=options)
+        self._unverified_options = {
+            "verify_aud": audience is not None,
+            "verify_signature": False,
+        }
+
+    @property
+    def leeway(self) -> float | int | timedelta | None:
+        return self._leeway
+
+    @leeway.setter
+    def leeway(self, leeway: float | int | timedelta | None) -> None:
+        self._leeway = leeway
+        # Normalized by get_leeway(), which raises if the type is unsupported
+        self._normalized_leeway: timedelta | None = None
 
     @cached_property
     def prepared_signing_key(self) -> Any:
@@ -73,12 +307,57 @@ class TokenBackend:
     def prepared_verifying_key(self) -> Any:
         return self._prepare_key(self.verifying_key)
 
+    @cached_property
+    def hmac_verifier(self) -> HMACVerifier | None:
+        """
+        The fast verifier for tokens signed with an HMAC algorithm, if it can
+        be used with this backend.
+        """
+        if (
+            not self.fast_hmac
+            or self.keyring is not None
+            or self.algorithm not in HMACVerifier.digests
+        ):
+            return None
+
+        key = self.prepared_signing_key
+        if isinstance(key, str):
+            # PyJWT 1.7.1 doesn't prepare keys up front
+            key = key.encode("utf-8")
+        if not isinstance(key, bytes):
+            # No signing key
+            return None
+
+        return HMACVerifier(key, self.algorithm, self.json_codec)
+
     def _prepare_key(self, key: str | None) -> Any:
-        # Support for PyJWT 1.7.1 or empty signing key
-        if key is None or not getattr(jwt.PyJWS, "get_algorithm_by_name", None):
-            return key
-        jws_alg = jwt.PyJWS().get_algorithm_by_name(self.algorithm)
-        return jws_alg.prepare_key(key)
+        return prepare_key(key, self.algorithm)
+
+    def _load_keyring(self, keyring: Iterable[dict[str, Any]]) -> KeyringKey:
+        """
+        Indexes the given keyring by "kid" and returns its active key.
+        """
+        self.keyring = {}
+        active_keys = []
+        for options in keyring:
+            key = KeyringKey(**options)
+            self._validate_algorithm(key.algorithm)
+
+            if key.kid in self.keyring:
+                raise TokenBackendError(
+                    format_lazy(_("Duplicate key id '{}' in keyring"), key.kid)
+                )
+            self.keyring[key.kid] = key
+
+            if key.active:
+                active_keys.append(key)
+
+        if len(active_keys) != 1:
+            raise TokenBackendError(_("Keyring must have exactly one active key"))
+
+        self.active_key = active_keys[0]
+
+        return self.active_key
 
     def _validate_algorithm(self, algorithm: str) -> None:
         """
@@ -98,6 +377,12 @@ class TokenBackend:
             )
 
     def get_leeway(self) -> timedelta:
+        if self._normalized_leeway is None:
+            self._normalized_leeway = self._normalize_leeway()
+
+        return self._normalized_leeway
+
+    def _normalize_leeway(self) -> timedelta:
         if self.leeway is None:
             return timedelta(seconds=0)
         elif isinstance(self.leeway, (int, float)):
@@ -126,6 +411,18 @@ class TokenBackend:
 
         return self.prepared_verifying_key
 
+    def get_keyring_key(self, token: Token) -> KeyringKey:
+        """
+        Returns the keyring key matching the "kid" header of the given token.
+        Tokens without a "kid" header match the key configured without one.
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+
+        try:
+            return self.keyring[kid]
+        except KeyError as e:
+            raise TokenBackendError(_("Token is invalid")) from e
+
     def encode(self, payload: dict[str, Any]) -> str:
         """
         Returns an encoded token for the given payload dictionary.
@@ -136,12 +433,25 @@ class TokenBackend:
         if self.issuer is not None:
             jwt_payload["iss"] = self.issuer
 
-        token = jwt.encode(
-            jwt_payload,
-            self.prepared_signing_key,
-            algorithm=self.algorithm,
-            json_encoder=self.json_encoder,
-        )
+        if self.keyring is not None:
+            token = self._jwt.encode(
+                jwt_payload,
+                self.active_key.prepared_signing_key,
+                algorithm=self.active_key.algorithm,
+                headers=(
+                    {"kid": self.active_key.kid}
+                    if self.active_key.kid is not None
+                    else None
+                ),
+                json_encoder=self.json_encoder,
+            )
+        else:
+            token = self._jwt.encode(
+                jwt_payload,
+                self.prepared_signing_key,
+                algorithm=self.algorithm,
+                json_encoder=self.json_encoder,
+            )
         if isinstance(token, bytes):
             # For PyJWT <= 1.7.1
             return token.decode("utf-8")
@@ -156,18 +466,34 @@ class TokenBackend:
         Raises a `TokenBackendError` if the token is malformed, if its
         signature check fails, or if its 'exp' claim indicates it has expired.
         """
+        if (
+            verify
+            and self.audience is None
+            and self.issuer is None
+            and self.hmac_verifier is not None
+        ):
+            payload = self.hmac_verifier.decode(
+                token, self.get_leeway().total_seconds()
+            )
+            if payload is not None:
+                return payload
+
         try:
-            return jwt.decode(
+            if self.keyring is not None:
+                key = self.get_keyring_key(token)
+                verifying_key, algorithms = key.prepared_verifying_key, key.algorithms
+            else:
+                verifying_key = self.get_verifying_key(token)
+                algorithms = self._algorithms
+
+            return self._jwt.decode(
                 token,
-                self.get_verifying_key(token),
-                algorithms=[self.algorithm],
+                verifying_key,
+                algorithms=algorithms,
                 audience=self.audience,
                 issuer=self.issuer,
                 leeway=self.get_leeway(),
-                options={
-                    "verify_aud": self.audience is not None,
-                    "verify_signature": verify,
-                },
+                options=None if verify else self._unverified_options,
             )
         except InvalidAlgorithmError as e:
             raise TokenBackendError(_("Invalid algorithm specified")) from e
@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from copy import copy
+from datetime import timedelta
+from typing import Any
+
+from django.core.cache import BaseCache, caches
+
+
+class LRUCache:
+    """
+    A thread-safe, size-bounded, in-process cache.  Every entry carries an
+    absolute expiry time (a unix timestamp) after which it is treated as
+    missing.  When the cache is full, the least recently used entry is
+    evicted to make room for a new one.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        if maxsize <= 0:
+            raise ValueError("'maxsize' must be a positive integer")
+
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: Hashable, default: Any | None = None) -> Any:
+        """
+        Returns the value stored for the given key or `default` if there is no
+        such entry or it has expired.
+        """
+        with self._lock:
+            try:
+                value, expires_at = self._data[key]
+            except KeyError:
+                return default
+
+            if expires_at <= time.time():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: float) -> None:
+        """
+        Stores a value until the unix timestamp given in `expires_at`.
+        """
+        if expires_at <= time.time():
+            return
+
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class UserCache:
+    """
+    Caches user instances by their identifier for `timeout`, either in an
+    in-process `LRUCache` of `maxsize` entries or, if `alias` is given, in
+    that Django cache.
+    """
+
+    key_prefix = "rest_framework_simplejwt.user:"
+
+    def __init__(
+        self, timeout: timedelta, alias: str | None = None, maxsize: int = 10_000
+    ) -> None:
+        self.timeout = timeout
+        self.alias = alias
+        self.maxsize = maxsize
+        self._local = LRUCache(maxsize) if alias is None else None
+
+    @property
+    def cache(self) -> BaseCache:
+        return caches[self.alias]
+
+    def make_key(self, user_id: Any) -> str:
+        return f"{self.key_prefix}{user_id}"
+
+    def get(self, user_id: Any) -> Any:
+        """
+        Returns the cached user with the given identifier or `None`.
+        """
+        if self._local is None:
+            return self.cache.get(self.make_key(user_id))
+
+        user = self._local.get(str(user_id))
+        # Changes made to the user while handling a request stay in it
+        return copy(user) if user is not None else None
+
+    async def aget(self, user_id: Any) -> Any:
+        if self._local is None:
+            return await self.cache.aget(self.make_key(user_id))
+
+        return self.get(user_id)
+
+    def set(self, user_id: Any, user: Any) -> None:
+        if self._local is None:
+            self.cache.set(self.make_key(user_id), user, self.timeout.total_seconds())
+        else:
+            self._local.set(
+                str(user_id), copy(user), time.time() + self.timeout.total_seconds()
+            )
+
+    async def aset(self, user_id: Any, user: Any) -> None:
+        if self._local is None:
+            await self.cache.aset(
+                self.make_key(user_id), user, self.timeout.total_seconds()
+            )
+        else:
+            self.set(user_id, user)
+
+    def delete(self, user_id: Any) -> None:
+        if self._local is None:
+            self.cache.delete(self.make_key(user_id))
+        else:
+            self._local.delete(str(user_id))
@@ -0,0 +1,57 @@
+import json
+from typing import Any
+
+from django.utils.translation import gettext_lazy as _
+
+from .exceptions import TokenBackendError
+from .utils import format_lazy
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONCodec:
+    """
+    Serializes and deserializes token payloads with the standard library's
+    `json` module.  `json_encoder` is the `JSONEncoder` subclass set by the
+    `JSON_ENCODER` setting, if any.
+    """
+
+    def __init__(self, json_encoder: type[json.JSONEncoder] | None = None) -> None:
+        self.json_encoder = json_encoder
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), cls=self.json_encoder).encode(
+            "utf-8"
+        )
+
+    def loads(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    Serializes and deserializes token payloads with orjson.  Types orjson
+    can't serialize, such as `Decimal`, are passed to the `default` method of
+    `json_encoder`.
+    """
+
+    def __init__(self, json_encoder: type[json.JSONEncoder] | None = None) -> None:
+        if orjson is None:
+            raise TokenBackendError(
+                format_lazy(
+                    _("You must have orjson installed to use {}."),
+                    type(self).__name__,
+                )
+            )
+
+        super().__init__(json_encoder)
+        self.default = json_encoder().default if json_encoder is not None else None
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=self.default)
+
+    def loads(self, data: bytes | str) -> Any:
+        return orjson.loads(data)
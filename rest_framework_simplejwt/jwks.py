@@ -0,0 +1,127 @@
+import threading
+import time
+from datetime import timedelta
+
+import jwt
+from jwt import PyJWK, PyJWKClient, PyJWKClientError, PyJWKSet, PyJWKSetError
+
+from .utils import logger
+
+
+class JWKSKeyManager:
+    """
+    Serves the signing keys published at a JWKS URL from memory, indexed by
+    their "kid".
+
+    The keys are fetched on first use, or when `start` is called, and then
+    refreshed every `refresh_interval` by a background thread so that requests
+    don't wait on the JWKS endpoint.  A token whose "kid" is unknown triggers
+    an early refresh to pick up rotated keys, but concurrent misses share a
+    single fetch and misses cause at most one fetch every
+    `miss_refresh_interval` seconds.
+    """
+
+    miss_refresh_interval = 10.0
+
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: timedelta = timedelta(minutes=5),
+        timeout: float = 30,
+    ) -> None:
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.client = PyJWKClient(url, timeout=timeout)
+
+        self._keys: dict[str, PyJWK] = {}
+        self._refresh_lock = threading.Lock()
+        self._refreshed_at: float | None = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """
+        Fetches the keys, unless they have been already, and starts the
+        thread refreshing them.  Call this at startup to keep the first
+        requests from waiting on the JWKS endpoint.
+        """
+        # The thread doesn't survive a fork, so check it is still running
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="simplejwt-jwks-refresh", daemon=True
+                )
+                self._thread.start()
+
+        if self._refreshed_at is None:
+            self.refresh(max_age=self.miss_refresh_interval)
+
+    def stop(self) -> None:
+        """
+        Stops the refresh thread.
+        """
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_interval.total_seconds()):
+            try:
+                self.refresh()
+            except PyJWKClientError:
+                # Keep serving the previous keys until the endpoint recovers
+                logger.warning("Could not refresh the keys from %s", self.url)
+
+    def refresh(self, max_age: float | None = None) -> None:
+        """
+        Fetches the keys from the JWKS URL.  If `max_age` is given, the fetch
+        is skipped when the keys were fetched less than `max_age` seconds ago,
+        which is the case for threads that waited on a concurrent fetch.
+        """
+        with self._refresh_lock:
+            if (
+                max_age is not None
+                and self._refreshed_at is not None
+                and time.monotonic() - self._refreshed_at < max_age
+            ):
+                return
+
+            # Even if the fetch fails, don't retry until `max_age` has passed
+            self._refreshed_at = time.monotonic()
+            try:
+                jwk_set = PyJWKSet.from_dict(self.client.fetch_data())
+            except PyJWKSetError as e:
+                raise PyJWKClientError(f"Invalid JWKS from {self.url}") from e
+
+            self._keys = {
+                jwk.key_id: jwk
+                for jwk in jwk_set.keys
+                if jwk.key_id and jwk.public_key_use in ("sig", None)
+            }
+
+    def get_signing_key(self, kid: str) -> PyJWK:
+        self.start()
+
+        key = self._keys.get(kid)
+        if key is None:
+            self.refresh(max_age=self.miss_refresh_interval)
+            key = self._keys.get(kid)
+
+        if key is None:
+            raise PyJWKClientError(
+                f'Unable to find a signing key that matches: "{kid}"'
+            )
+
+        return key
+
+    def get_signing_key_from_jwt(self, token: str | bytes) -> PyJWK:
+        """
+        Returns the key matching the "kid" header of the given token.  Mirrors
+        `PyJWKClient.get_signing_key_from_jwt`.
+        """
+        header = jwt.get_unverified_header(token)
+
+        return self.get_signing_key(header.get("kid"))
@@ -53,6 +53,25 @@ class TokenUser:
     def is_superuser(self) -> bool:
         return self.token.get("is_superuser", False)
 
+    @cached_property
+    def permissions(self) -> frozenset[str]:
+        """
+        The permissions in the `USER_PERMISSIONS_CLAIM` claim of the token, in
+        the "<app_label>.<codename>" form of `User.get_all_permissions`.
+        """
+        if api_settings.USER_PERMISSIONS_CLAIM is None:
+            return frozenset()
+        return frozenset(self.token.get(api_settings.USER_PERMISSIONS_CLAIM, ()))
+
+    @cached_property
+    def group_names(self) -> frozenset[str]:
+        """
+        The names of the groups in the `USER_GROUPS_CLAIM` claim of the token.
+        """
+        if api_settings.USER_GROUPS_CLAIM is None:
+            return frozenset()
+        return frozenset(self.token.get(api_settings.USER_GROUPS_CLAIM, ()))
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, TokenUser):
             return NotImplemented
@@ -88,16 +107,29 @@ class TokenUser:
         return set()
 
     def get_all_permissions(self, obj: object | None = None) -> set:
-        return set()
+        # Like Django's ModelBackend, there are no object permissions
+        if obj is not None:
+            return set()
+        return set(self.permissions)
 
     def has_perm(self, perm: str, obj: object | None = None) -> bool:
-        return False
+        if api_settings.USER_PERMISSIONS_CLAIM is None:
+            return False
+        if self.is_superuser:
+            return True
+        return obj is None and perm in self.permissions
 
     def has_perms(self, perm_list: list[str], obj: object | None = None) -> bool:
-        return False
+        if api_settings.USER_PERMISSIONS_CLAIM is None:
+            return False
+        return all(self.has_perm(perm, obj) for perm in perm_list)
 
     def has_module_perms(self, module: str) -> bool:
-        return False
+        if api_settings.USER_PERMISSIONS_CLAIM is None:
+            return False
+        if self.is_superuser:
+            return True
+        return any(perm.startswith(f"{module}.") for perm in self.permissions)
 
     @property
     def is_anonymous(self) -> bool:
@@ -10,13 +10,14 @@ from rest_framework.request import Request
 
 from .models import TokenUser
 from .settings import api_settings
+from .token_blacklist.epochs import is_token_revoked
 from .tokens import RefreshToken, SlidingToken, Token, UntypedToken
 from .utils import get_md5_hash_password
 
 AuthUser = TypeVar("AuthUser", AbstractBaseUser, TokenUser)
 
 if api_settings.BLACKLIST_AFTER_ROTATION:
-    from .token_blacklist.models import BlacklistedToken
+    from .token_blacklist.backends import get_revocation_backend
 
 
 class PasswordField(serializers.CharField):
@@ -112,15 +113,22 @@ class TokenRefreshSerializer(serializers.Serializer):
     default_error_messages = {
         "no_active_account": _("No active account found for the given token."),
         "password_changed": _("The user's password has been changed."),
+        "token_revoked": _("The user's tokens have been revoked."),
     }
 
     def validate(self, attrs: dict[str, Any]) -> dict[str, str]:
         refresh = self.token_class(attrs["refresh"])
 
+        if api_settings.CHECK_TOKEN_EPOCH and is_token_revoked(refresh):
+            raise AuthenticationFailed(
+                self.error_messages["token_revoked"], code="token_revoked"
+            )
+
+        user = None
         user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
         if user_id:
             try:
-                user = get_user_model().objects.get(
+                user = api_settings.USER_QUERYSET().get(
                     **{api_settings.USER_ID_FIELD: user_id}
                 )
             except get_user_model().DoesNotExist:
@@ -156,19 +164,9 @@ class TokenRefreshSerializer(serializers.Serializer):
 
         data = {"access": str(refresh.access_token)}
         if api_settings.ROTATE_REFRESH_TOKENS:
-            if api_settings.BLACKLIST_AFTER_ROTATION:
-                try:
-                    # Attempt to blacklist the given refresh token
-                    refresh.blacklist()
-                except AttributeError:
-                    # If blacklist app not installed, `blacklist` method will
-                    # not be present
-                    pass
-
-            refresh.set_jti()
-            refresh.set_exp()
-            refresh.set_iat()
-            refresh.outstand()
+            # With the blacklist app, also blacklists the given refresh token
+            # if `BLACKLIST_AFTER_ROTATION` is enabled
+            refresh.rotate(user)
 
             data["refresh"] = str(refresh)
 
@@ -182,14 +180,21 @@ class TokenRefreshSlidingSerializer(serializers.Serializer):
     default_error_messages = {
         "no_active_account": _("No active account found for the given token."),
         "password_changed": _("The user's password has been changed."),
+        "token_revoked": _("The user's tokens have been revoked."),
     }
 
     def validate(self, attrs: dict[str, Any]) -> dict[str, str]:
         token = self.token_class(attrs["token"])
+
+        if api_settings.CHECK_TOKEN_EPOCH and is_token_revoked(token):
+            raise AuthenticationFailed(
+                self.error_messages["token_revoked"], code="token_revoked"
+            )
+
         user_id = token.payload.get(api_settings.USER_ID_CLAIM, None)
         if user_id:
             try:
-                user = get_user_model().objects.get(
+                user = api_settings.USER_QUERYSET().get(
                     **{api_settings.USER_ID_FIELD: user_id}
                 )
             except get_user_model().DoesNotExist:
@@ -245,9 +250,12 @@ class TokenVerifySerializer(serializers.Serializer):
             and "rest_framework_simplejwt.token_blacklist" in settings.INSTALLED_APPS
         ):
             jti = token.get(api_settings.JTI_CLAIM)
-            if BlacklistedToken.objects.filter(token__jti=jti).exists():
+            if get_revocation_backend().is_revoked(jti):
                 raise ValidationError(_("Token is blacklisted"))
 
+        if api_settings.CHECK_TOKEN_EPOCH and is_token_revoked(token):
+            raise ValidationError(_("Token has been revoked"))
+
         return {}
 
 
@@ -20,6 +20,10 @@ DEFAULTS = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": False,
     "BLACKLIST_AFTER_ROTATION": False,
+    "BLACKLIST_INDEX_REFRESH_INTERVAL": None,
+    "BLACKLIST_INDEX_CAPACITY": 100_000,
+    "REVOCATION_BACKEND": "rest_framework_simplejwt.token_blacklist.backends.ModelRevocationBackend",
+    "REVOCATION_CACHE_ALIAS": "default",
     "UPDATE_LAST_LOGIN": False,
     "ALGORITHM": "HS256",
     "SIGNING_KEY": settings.SECRET_KEY,
@@ -27,16 +31,27 @@ DEFAULTS = {
     "AUDIENCE": None,
     "ISSUER": None,
     "JSON_ENCODER": None,
+    "JSON_CODEC": "rest_framework_simplejwt.codecs.JSONCodec",
     "JWK_URL": None,
+    "JWK_REFRESH_INTERVAL": timedelta(minutes=5),
+    "KEYRING": None,
+    "TOKEN_BACKENDS": {},
     "LEEWAY": 0,
     "AUTH_HEADER_TYPES": ("Bearer",),
     "AUTH_HEADER_NAME": "HTTP_AUTHORIZATION",
     "USER_ID_FIELD": "id",
     "USER_ID_CLAIM": "user_id",
+    "USER_PERMISSIONS_CLAIM": None,
+    "USER_GROUPS_CLAIM": None,
     "USER_AUTHENTICATION_RULE": "rest_framework_simplejwt.authentication.default_user_authentication_rule",
+    "USER_QUERYSET": "rest_framework_simplejwt.utils.default_user_queryset",
     "ON_LOGIN_SUCCESS": "rest_framework_simplejwt.serializers.default_on_login_success",
     "ON_LOGIN_FAILED": "rest_framework_simplejwt.serializers.default_on_login_failed",
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
+    "AUTH_TOKEN_CACHE_SIZE": 0,
+    "USER_CACHE_TIMEOUT": None,
+    "USER_CACHE_ALIAS": None,
+    "USER_CACHE_SIZE": 10_000,
     "TOKEN_TYPE_CLAIM": "token_type",
     "JTI_CLAIM": "jti",
     "TOKEN_USER_CLASS": "rest_framework_simplejwt.models.TokenUser",
@@ -51,14 +66,20 @@ DEFAULTS = {
     "SLIDING_TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer",
     "CHECK_REVOKE_TOKEN": False,
     "REVOKE_TOKEN_CLAIM": "hash_password",
+    "CHECK_TOKEN_EPOCH": False,
+    "TOKEN_EPOCH_CLAIM": "token_epoch",
+    "TOKEN_EPOCH_CACHE_TIMEOUT": timedelta(minutes=5),
     "CHECK_USER_IS_ACTIVE": True,
 }
 
 IMPORT_STRINGS = (
     "AUTH_TOKEN_CLASSES",
     "JSON_ENCODER",
+    "JSON_CODEC",
+    "REVOCATION_BACKEND",
     "TOKEN_USER_CLASS",
     "USER_AUTHENTICATION_RULE",
+    "USER_QUERYSET",
     "ON_LOGIN_SUCCESS",
     "ON_LOGIN_FAILED",
 )
@@ -1,13 +1,65 @@
+from typing import Any
+
+from django.utils.module_loading import import_string
+
 from .backends import TokenBackend
 from .settings import api_settings
 
-token_backend = TokenBackend(
-    api_settings.ALGORITHM,
-    api_settings.SIGNING_KEY,
-    api_settings.VERIFYING_KEY,
-    api_settings.AUDIENCE,
-    api_settings.ISSUER,
-    api_settings.JWK_URL,
-    api_settings.LEEWAY,
-    api_settings.JSON_ENCODER,
-)
+
+def make_token_backend(**overrides: Any) -> TokenBackend:
+    """
+    Returns a token backend built from the token backend settings, with any
+    of them replaced by the given overrides.
+    """
+    options = {
+        "ALGORITHM": api_settings.ALGORITHM,
+        "SIGNING_KEY": api_settings.SIGNING_KEY,
+        "VERIFYING_KEY": api_settings.VERIFYING_KEY,
+        "AUDIENCE": api_settings.AUDIENCE,
+        "ISSUER": api_settings.ISSUER,
+        "JWK_URL": api_settings.JWK_URL,
+        "LEEWAY": api_settings.LEEWAY,
+        "JSON_ENCODER": api_settings.JSON_ENCODER,
+        "JSON_CODEC": api_settings.JSON_CODEC,
+        "JWK_REFRESH_INTERVAL": api_settings.JWK_REFRESH_INTERVAL,
+        "KEYRING": api_settings.KEYRING,
+    }
+    options.update(overrides)
+
+    json_encoder = options["JSON_ENCODER"]
+    if isinstance(json_encoder, str):
+        json_encoder = import_string(json_encoder)
+    json_codec = options["JSON_CODEC"]
+    if isinstance(json_codec, str):
+        json_codec = import_string(json_codec)
+
+    return TokenBackend(
+        options["ALGORITHM"],
+        options["SIGNING_KEY"],
+        options["VERIFYING_KEY"],
+        options["AUDIENCE"],
+        options["ISSUER"],
+        options["JWK_URL"],
+        options["LEEWAY"],
+        json_encoder,
+        options["JWK_REFRESH_INTERVAL"],
+        options["KEYRING"],
+        json_codec=json_codec,
+    )
+
+
+token_backend = make_token_backend()
+
+# Token backends configured for specific token types
+token_backends: dict[str, TokenBackend] = {
+    token_type: make_token_backend(**overrides)
+    for token_type, overrides in api_settings.TOKEN_BACKENDS.items()
+}
+
+
+def get_token_backend(token_type: str | None) -> TokenBackend:
+    """
+    Returns the token backend for the given token type, which is the default
+    `token_backend` unless one is configured in `TOKEN_BACKENDS`.
+    """
+    return token_backends.get(token_type, token_backend)
@@ -1,13 +1,16 @@
 from datetime import datetime
 from typing import Any, Optional, TypeVar
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.auth import get_permission_codename
 from django.contrib.auth.models import AbstractBaseUser
 from django.db.models import QuerySet
 from django.utils.translation import gettext_lazy as _
+from django.utils.translation import ngettext
 from rest_framework.request import Request
 
 from ..models import TokenUser
+from .backends import get_revocation_backend
 from .models import BlacklistedToken, OutstandingToken
 
 AuthUser = TypeVar("AuthUser", AbstractBaseUser, TokenUser)
@@ -24,7 +27,33 @@ class OutstandingTokenAdmin(admin.ModelAdmin):
         "user__id",
         "jti",
     )
-    ordering = ("user",)
+    ordering = ("-id",)
+
+    actions = ("blacklist_tokens",)
+
+    @admin.action(
+        description=_("Blacklist selected tokens"),
+        permissions=("blacklist",),
+    )
+    def blacklist_tokens(self, request: Request, queryset: QuerySet) -> None:
+        count = get_revocation_backend().revoke_outstanding(queryset)
+
+        self.message_user(
+            request,
+            ngettext(
+                "%(count)d token was blacklisted.",
+                "%(count)d tokens were blacklisted.",
+                count,
+            )
+            % {"count": count},
+            messages.SUCCESS,
+        )
+
+    def has_blacklist_permission(self, request: Request) -> bool:
+        opts = BlacklistedToken._meta
+        codename = get_permission_codename("add", opts)
+
+        return request.user.has_perm(f"{opts.app_label}.{codename}")
 
     def get_queryset(self, *args, **kwargs) -> QuerySet:
         qs = super().get_queryset(*args, **kwargs)
@@ -32,8 +61,6 @@ class OutstandingTokenAdmin(admin.ModelAdmin):
         return qs.select_related("user")
 
     # Read-only behavior defined below
-    actions = None
-
     def get_readonly_fields(self, *args, **kwargs) -> list[Any]:
         return [f.name for f in self.model._meta.fields]
 
@@ -64,9 +91,9 @@ class BlacklistedTokenAdmin(admin.ModelAdmin):
     )
     search_fields = (
         "token__user__id",
-        "token__jti",
+        "jti",
     )
-    ordering = ("token__user",)
+    ordering = ("-id",)
 
     def get_queryset(self, *args, **kwargs) -> QuerySet:
         qs = super().get_queryset(*args, **kwargs)
@@ -74,10 +101,10 @@ class BlacklistedTokenAdmin(admin.ModelAdmin):
         return qs.select_related("token__user")
 
     def token_jti(self, obj: BlacklistedToken) -> str:
-        return obj.token.jti
+        return obj.jti
 
     token_jti.short_description = _("jti")  # type: ignore
-    token_jti.admin_order_field = "token__jti"  # type: ignore
+    token_jti.admin_order_field = "jti"  # type: ignore
 
     def token_user(self, obj: BlacklistedToken) -> AuthUser:
         return obj.token.user
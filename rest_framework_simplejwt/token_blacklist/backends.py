@@ -0,0 +1,300 @@
+import math
+import time
+from collections.abc import Iterable, Iterator
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+from asgiref.sync import sync_to_async
+from django.core.cache import BaseCache, caches
+from django.db import transaction
+from django.db.models import QuerySet, Subquery
+
+from ..settings import api_settings
+from ..utils import aware_utcnow, datetime_from_epoch, datetime_to_epoch
+from .index import get_blacklist_index
+from .models import BlacklistedToken, OutstandingToken, RevokedToken
+
+if TYPE_CHECKING:
+    from ..tokens import Token
+
+
+class BaseRevocationBackend:
+    """
+    Stores the ids ("jti" claims) of revoked tokens and answers whether a
+    given token id has been revoked.
+    """
+
+    # Whether tokens created for users are added to the outstanding token
+    # list, which backends storing revoked tokens on their own don't need
+    outstand_tokens = True
+
+    def is_revoked(self, jti: str) -> bool:
+        raise NotImplementedError()
+
+    async def ais_revoked(self, jti: str) -> bool:
+        """
+        Async counterpart of `is_revoked`.  Runs it in a thread unless
+        overridden.
+        """
+        return await sync_to_async(self.is_revoked)(jti)
+
+    def revoke(self, jti: str, exp: int) -> Any:
+        """
+        Revokes the token with the given id.  `exp` is the token's expiration
+        time as a unix timestamp, after which it no longer needs to be stored.
+        """
+        raise NotImplementedError()
+
+    def revoke_many(self, tokens: Iterable[tuple[str, int]]) -> None:
+        """
+        Revokes every token in the given iterable of `(jti, exp)` pairs.
+        """
+        for jti, exp in tokens:
+            self.revoke(jti, exp)
+
+    def revoke_token(self, token: "Token") -> Any:
+        """
+        Revokes the given token instance.  Used by `BlacklistMixin.blacklist`.
+        """
+        return self.revoke(token[api_settings.JTI_CLAIM], token["exp"])
+
+    async def arevoke_token(self, token: "Token") -> Any:
+        """
+        Async counterpart of `revoke_token`.  Runs it in a thread unless
+        overridden.
+        """
+        return await sync_to_async(self.revoke_token)(token)
+
+    def revoke_outstanding_token(self, token: OutstandingToken) -> Any:
+        """
+        Revokes the token of the given outstanding token, which has been
+        saved.
+        """
+        return self.revoke(token.jti, datetime_to_epoch(token.expires_at))
+
+    def revoke_outstanding(self, queryset: QuerySet) -> int:
+        """
+        Revokes every token in the given `OutstandingToken` queryset.  Returns
+        the number of tokens revoked.
+        """
+        count = 0
+
+        def tokens() -> Iterator[tuple[str, int]]:
+            nonlocal count
+            for jti, expires_at in queryset.values_list("jti", "expires_at").iterator():
+                count += 1
+                yield jti, datetime_to_epoch(expires_at)
+
+        self.revoke_many(tokens())
+
+        return count
+
+
+class ModelRevocationBackend(BaseRevocationBackend):
+    """
+    The default backend.  Revoked tokens are stored as `BlacklistedToken` rows
+    pointing to their `OutstandingToken` row.
+    """
+
+    def is_revoked(self, jti: str) -> bool:
+        blacklist_index = get_blacklist_index()
+        if blacklist_index is not None and jti not in blacklist_index:
+            return False
+
+        return BlacklistedToken.objects.filter(jti=jti).exists()
+
+    async def ais_revoked(self, jti: str) -> bool:
+        blacklist_index = get_blacklist_index()
+        if blacklist_index is not None and not await blacklist_index.acontains(jti):
+            return False
+
+        return await BlacklistedToken.objects.filter(jti=jti).aexists()
+
+    def revoke(self, jti: str, exp: int) -> tuple[BlacklistedToken, bool]:
+        OutstandingToken.objects.insert(
+            OutstandingToken(
+                jti=jti,
+                created_at=aware_utcnow(),
+                expires_at=datetime_from_epoch(exp),
+            )
+        )
+
+        return self._blacklist(jti)
+
+    def revoke_many(self, tokens: Iterable[tuple[str, int]]) -> None:
+        with transaction.atomic():
+            super().revoke_many(tokens)
+
+    def revoke_outstanding(self, queryset: QuerySet) -> int:
+        revoked = BlacklistedToken.objects.revoke_where(queryset)
+
+        # Load the tokens just blacklisted into this process's index
+        blacklist_index = get_blacklist_index()
+        if blacklist_index is not None and revoked:
+            blacklist_index.refresh()
+
+        return revoked
+
+    def revoke_outstanding_token(self, token: OutstandingToken) -> int:
+        revoked = BlacklistedToken.objects.revoke_where(
+            OutstandingToken.objects.filter(jti=token.jti)
+        )
+
+        blacklist_index = get_blacklist_index()
+        if blacklist_index is not None:
+            blacklist_index.add(token.jti)
+
+        return revoked
+
+    def revoke_token(self, token: "Token") -> tuple[BlacklistedToken, bool]:
+        jti = token[api_settings.JTI_CLAIM]
+
+        # Ensure outstanding token exists with given jti
+        OutstandingToken.objects.insert(
+            OutstandingToken(
+                jti=jti,
+                user_id=OutstandingToken.objects.user_pk(
+                    token.get(api_settings.USER_ID_CLAIM)
+                ),
+                token=str(token),
+                created_at=token.current_time,
+                expires_at=datetime_from_epoch(token["exp"]),
+            )
+        )
+
+        return self._blacklist(jti)
+
+    def _blacklist(self, jti: str) -> tuple[BlacklistedToken, bool]:
+        blacklisted_token = BlacklistedToken.objects.get_or_create(
+            jti=jti,
+            defaults={
+                "token_id": Subquery(
+                    OutstandingToken.objects.filter(jti=jti).values("pk")[:1]
+                )
+            },
+        )
+
+        blacklist_index = get_blacklist_index()
+        if blacklist_index is not None:
+            blacklist_index.add(jti)
+
+        return blacklisted_token
+
+
+class JtiRevocationBackend(BaseRevocationBackend):
+    """
+    Stores only the ids and expiration times of revoked tokens, as
+    `RevokedToken` rows.  Tokens are revoked from their payload alone and are
+    not added to the outstanding token list when they are created, which
+    saves a write on every login.
+
+    Tokens blacklisted as `BlacklistedToken` rows, e.g. by the default backend
+    before switching to this one, remain revoked: both tables are checked,
+    with a single query.
+    """
+
+    outstand_tokens = False
+
+    def _revoked(self, jti: str) -> QuerySet:
+        return (
+            RevokedToken.objects.filter(jti=jti)
+            .values("jti")
+            .union(BlacklistedToken.objects.filter(jti=jti).values("jti"))
+        )
+
+    def is_revoked(self, jti: str) -> bool:
+        return self._revoked(jti).exists()
+
+    async def ais_revoked(self, jti: str) -> bool:
+        return await self._revoked(jti).aexists()
+
+    def revoke(self, jti: str, exp: int) -> None:
+        self.revoke_many([(jti, exp)])
+
+    def revoke_many(self, tokens: Iterable[tuple[str, int]]) -> None:
+        RevokedToken.objects.insert_many(
+            [
+                RevokedToken(jti=jti, expires_at=datetime_from_epoch(exp))
+                for jti, exp in tokens
+            ]
+        )
+
+
+class CacheRevocationBackend(BaseRevocationBackend):
+    """
+    Stores revoked token ids in the Django cache configured by the
+    `REVOCATION_CACHE_ALIAS` setting.  Each entry expires once its token is no
+    longer accepted, `LEEWAY` after its expiration time, so the cache never
+    needs to be flushed.
+
+    The cache must be shared by every process serving requests (e.g. Redis or
+    Memcached) and must not evict entries before they expire, or revoked
+    tokens will be accepted again.
+    """
+
+    key_prefix = "simplejwt:revoked:"
+
+    @property
+    def cache(self) -> BaseCache:
+        return caches[api_settings.REVOCATION_CACHE_ALIAS]
+
+    def make_key(self, jti: str) -> str:
+        return self.key_prefix + jti
+
+    def get_leeway(self) -> int:
+        """
+        Returns the largest leeway, in whole seconds, for which a token
+        backend accepts tokens past their expiration time.
+        """
+        leeways = [api_settings.LEEWAY] + [
+            overrides["LEEWAY"]
+            for overrides in api_settings.TOKEN_BACKENDS.values()
+            if "LEEWAY" in overrides
+        ]
+
+        return max(
+            math.ceil(
+                leeway.total_seconds() if isinstance(leeway, timedelta) else leeway or 0
+            )
+            for leeway in leeways
+        )
+
+    def is_revoked(self, jti: str) -> bool:
+        return self.cache.get(self.make_key(jti)) is not None
+
+    async def ais_revoked(self, jti: str) -> bool:
+        return await self.cache.aget(self.make_key(jti)) is not None
+
+    def revoke(self, jti: str, exp: int) -> None:
+        self.revoke_many([(jti, exp)])
+
+    def revoke_many(self, tokens: Iterable[tuple[str, int]]) -> None:
+        # Group by remaining lifetime so entries can be written with set_many
+        now = int(time.time())
+        leeway = self.get_leeway()
+        by_timeout: dict[int, dict[str, int]] = {}
+        for jti, exp in tokens:
+            timeout = exp + leeway - now
+            if timeout > 0:
+                by_timeout.setdefault(timeout, {})[self.make_key(jti)] = exp
+
+        cache = self.cache
+        for timeout, entries in by_timeout.items():
+            cache.set_many(entries, timeout)
+
+
+_revocation_backend: BaseRevocationBackend | None = None
+
+
+def get_revocation_backend() -> BaseRevocationBackend:
+    """
+    Returns the process-wide instance of the class configured by the
+    `REVOCATION_BACKEND` setting.
+    """
+    global _revocation_backend
+
+    backend_class = api_settings.REVOCATION_BACKEND
+    if type(_revocation_backend) is not backend_class:
+        _revocation_backend = backend_class()
+
+    return _revocation_backend
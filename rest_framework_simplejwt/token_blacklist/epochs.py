@@ -0,0 +1,120 @@
+from typing import TYPE_CHECKING, Any
+
+from django.contrib.auth.models import AbstractBaseUser
+from django.core.cache import BaseCache, caches
+from django.db import transaction
+from django.db.models import QuerySet
+
+from ..settings import api_settings
+from .models import TokenEpoch
+
+if TYPE_CHECKING:
+    from ..tokens import Token
+
+KEY_PREFIX = "simplejwt:epoch:"
+
+
+def get_cache() -> BaseCache:
+    return caches[api_settings.REVOCATION_CACHE_ALIAS]
+
+
+def make_key(user_id: Any) -> str:
+    return f"{KEY_PREFIX}{user_id}"
+
+
+def _epochs(user_id: Any) -> QuerySet:
+    return TokenEpoch.objects.filter(
+        **{f"user__{api_settings.USER_ID_FIELD}": user_id}
+    ).values_list("epoch", flat=True)
+
+
+def get_token_epoch(user_id: Any, cached: bool = True) -> int:
+    """
+    Returns the number of times the tokens of the user with the given
+    `USER_ID_FIELD` value have been revoked.  Looked up in the cache
+    configured by the `REVOCATION_CACHE_ALIAS` setting before querying the
+    database, unless `cached` is false.
+
+    Tokens are issued with the epoch read from the database: a cache local to
+    each process may not have seen the latest revocation, and tokens issued
+    with a stale epoch would be rejected by the processes which have.
+    """
+    if not cached:
+        return _epochs(user_id).first() or 0
+
+    cache = get_cache()
+    key = make_key(user_id)
+
+    epoch = cache.get(key)
+    if epoch is None:
+        epoch = _epochs(user_id).first() or 0
+        cache.set(key, epoch, api_settings.TOKEN_EPOCH_CACHE_TIMEOUT.total_seconds())
+
+    return epoch
+
+
+async def aget_token_epoch(user_id: Any) -> int:
+    """
+    Async counterpart of `get_token_epoch`.
+    """
+    cache = get_cache()
+    key = make_key(user_id)
+
+    epoch = await cache.aget(key)
+    if epoch is None:
+        epoch = await _epochs(user_id).afirst() or 0
+        await cache.aset(
+            key, epoch, api_settings.TOKEN_EPOCH_CACHE_TIMEOUT.total_seconds()
+        )
+
+    return epoch
+
+
+def revoke_user_tokens(user: AbstractBaseUser) -> TokenEpoch:
+    """
+    Revokes all the tokens issued to the given user so far, e.g. when the user
+    logs out everywhere or changes their password, by incrementing a single
+    counter per user.  Tokens issued afterwards are valid.
+    """
+    with transaction.atomic():
+        token_epoch, created = TokenEpoch.objects.select_for_update().get_or_create(
+            user=user, defaults={"epoch": 1}
+        )
+        if not created:
+            token_epoch.epoch += 1
+            token_epoch.save(update_fields=["epoch", "revoked_at"])
+
+    get_cache().set(
+        make_key(getattr(user, api_settings.USER_ID_FIELD)),
+        token_epoch.epoch,
+        api_settings.TOKEN_EPOCH_CACHE_TIMEOUT.total_seconds(),
+    )
+
+    return token_epoch
+
+
+def _is_before_epoch(token: "Token", epoch: int) -> bool:
+    return token.get(api_settings.TOKEN_EPOCH_CLAIM, 0) < epoch
+
+
+def is_token_revoked(token: "Token") -> bool:
+    """
+    Returns whether the given token was issued before the tokens of its user
+    were last revoked by `revoke_user_tokens`.
+    """
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    if user_id is None:
+        return False
+
+    return _is_before_epoch(token, get_token_epoch(user_id))
+
+
+async def ais_token_revoked(token: "Token") -> bool:
+    """
+    Async counterpart of `is_token_revoked`.
+    """
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    if user_id is None:
+        return False
+
+    return _is_before_epoch(token, await aget_token_epoch(user_id))
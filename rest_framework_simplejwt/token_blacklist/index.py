@@ -0,0 +1,167 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+
+from ..settings import api_settings
+from ..utils import aware_utcnow
+from .models import BlacklistedToken
+
+
+class BloomFilter:
+    """
+    A fixed-size Bloom filter of strings.  Membership tests may return false
+    positives at roughly the given error rate once `capacity` items have been
+    added, but never false negatives.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        capacity = max(capacity, 1)
+
+        self.capacity = capacity
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> list[int]:
+        # Double hashing: derives all bit positions from a single digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class BlacklistIndex:
+    """
+    An in-process index of blacklisted jtis used to answer the common "token
+    is not blacklisted" case without querying the database.
+
+    The index is rebuilt from `BlacklistedToken` on first use and refreshed
+    incrementally, from the `blacklisted_at` column, every `refresh_interval`.
+    A jti found in the index may be a false positive and must be confirmed
+    against the database.  A jti *not* found in the index is only guaranteed
+    not to have been blacklisted as of the last refresh, unless it was
+    blacklisted through this process.
+    """
+
+    error_rate = 0.001
+
+    # How far back each incremental refresh reaches before the previous one
+    # started, to pick up rows from transactions which committed after it
+    refresh_overlap = timedelta(seconds=30)
+
+    def __init__(self, refresh_interval: timedelta, capacity: int) -> None:
+        self.refresh_interval = refresh_interval
+        self.capacity = capacity
+
+        self._lock = threading.Lock()
+        self._filter = BloomFilter(capacity, self.error_rate)
+        self._count = 0
+        self._refreshed_at: datetime | None = None
+        self._next_refresh = 0.0
+
+    def __contains__(self, jti: str) -> bool:
+        if time.monotonic() >= self._next_refresh:
+            self._refresh_if_due()
+
+        return jti in self._filter
+
+    async def acontains(self, jti: str) -> bool:
+        """
+        Async counterpart of `jti in index`.  Refreshes the index in a thread
+        when it is due.
+        """
+        if time.monotonic() >= self._next_refresh:
+            await sync_to_async(self._refresh_if_due)()
+
+        return jti in self._filter
+
+    def add(self, jti: str) -> None:
+        with self._lock:
+            self._add(jti)
+
+    def _add(self, jti: str) -> None:
+        if jti not in self._filter:
+            self._filter.add(jti)
+            self._count += 1
+
+    def refresh(self, full: bool = False) -> None:
+        """
+        Loads jtis blacklisted since the previous refresh into the index.  A
+        full rebuild is performed on first use, when requested, or once the
+        index holds more jtis than it was sized for.
+        """
+        with self._lock:
+            self._refresh(full)
+
+    def _refresh_if_due(self) -> None:
+        with self._lock:
+            # Another thread may have refreshed the index while this one was
+            # waiting for the lock
+            if time.monotonic() >= self._next_refresh:
+                self._refresh()
+
+    def _refresh(self, full: bool = False) -> None:
+        started_at = aware_utcnow()
+        queryset = BlacklistedToken.objects.all()
+
+        if not full and self._refreshed_at is not None:
+            self._load(
+                queryset.filter(
+                    blacklisted_at__gte=self._refreshed_at - self.refresh_overlap
+                )
+            )
+            full = self._count > self.capacity
+
+        if full or self._refreshed_at is None:
+            self.capacity = max(self.capacity, 2 * queryset.count())
+            self._filter = BloomFilter(self.capacity, self.error_rate)
+            self._count = 0
+            self._load(queryset)
+
+        self._refreshed_at = started_at
+        self._next_refresh = time.monotonic() + self.refresh_interval.total_seconds()
+
+    def _load(self, queryset: QuerySet) -> None:
+        for jti in queryset.values_list("jti", flat=True).iterator():
+            self._add(jti)
+
+
+_blacklist_index: BlacklistIndex | None = None
+
+
+def get_blacklist_index() -> BlacklistIndex | None:
+    """
+    Returns the process-wide blacklist index or `None` if it has been disabled
+    through the `BLACKLIST_INDEX_REFRESH_INTERVAL` setting.
+    """
+    global _blacklist_index
+
+    refresh_interval = api_settings.BLACKLIST_INDEX_REFRESH_INTERVAL
+    if refresh_interval is None:
+        return None
+
+    if (
+        _blacklist_index is None
+        or _blacklist_index.refresh_interval != refresh_interval
+    ):
+        _blacklist_index = BlacklistIndex(
+            refresh_interval, api_settings.BLACKLIST_INDEX_CAPACITY
+        )
+
+    return _blacklist_index
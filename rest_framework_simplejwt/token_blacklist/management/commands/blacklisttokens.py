@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import aware_utcnow, make_utc
+
+from ...backends import get_revocation_backend
+from ...models import OutstandingToken
+
+
+class Command(BaseCommand):
+    help = "Blacklists the unexpired outstanding tokens matching the given filters"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--user",
+            action="append",
+            dest="users",
+            default=[],
+            help="Blacklist the tokens of the user with this USER_ID_FIELD value. "
+            "May be given more than once.",
+        )
+        parser.add_argument(
+            "--created-after",
+            help="Blacklist tokens created at or after this ISO 8601 datetime.",
+        )
+        parser.add_argument(
+            "--created-before",
+            help="Blacklist tokens created before this ISO 8601 datetime.",
+        )
+
+    def parse_datetime(self, value: str) -> datetime:
+        dt = parse_datetime(value)
+        if dt is None:
+            raise CommandError(f"'{value}' is not a valid ISO 8601 datetime")
+
+        return make_utc(dt)
+
+    def handle(self, *args, **options) -> None:
+        queryset = OutstandingToken.objects.filter(expires_at__gt=aware_utcnow())
+
+        if not (
+            options["users"] or options["created_after"] or options["created_before"]
+        ):
+            raise CommandError(
+                "Give at least one of --user, --created-after or --created-before"
+            )
+
+        if options["users"]:
+            queryset = queryset.filter(
+                **{f"user__{api_settings.USER_ID_FIELD}__in": options["users"]}
+            )
+
+        if options["created_after"]:
+            queryset = queryset.filter(
+                created_at__gte=self.parse_datetime(options["created_after"])
+            )
+
+        if options["created_before"]:
+            queryset = queryset.filter(
+                created_at__lt=self.parse_datetime(options["created_before"])
+            )
+
+        count = get_revocation_backend().revoke_outstanding(queryset)
+
+        self.stdout.write(f"Blacklisted {count} token(s)")
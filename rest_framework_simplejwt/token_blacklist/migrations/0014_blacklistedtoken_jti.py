@@ -0,0 +1,36 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_jti(apps, schema_editor):
+    BlacklistedToken = apps.get_model("token_blacklist", "BlacklistedToken")
+    OutstandingToken = apps.get_model("token_blacklist", "OutstandingToken")
+
+    db_alias = schema_editor.connection.alias
+    BlacklistedToken.objects.using(db_alias).update(
+        jti=Subquery(
+            OutstandingToken.objects.using(db_alias)
+            .filter(pk=OuterRef("token_id"))
+            .values("jti")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("token_blacklist", "0013_alter_blacklistedtoken_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blacklistedtoken",
+            name="jti",
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.RunPython(populate_jti, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="blacklistedtoken",
+            name="jti",
+            field=models.CharField(editable=False, max_length=255, unique=True),
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("token_blacklist", "0014_blacklistedtoken_jti"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="outstandingtoken",
+            name="expires_at",
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
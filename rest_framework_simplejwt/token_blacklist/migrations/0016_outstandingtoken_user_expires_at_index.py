@@ -0,0 +1,37 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("token_blacklist", "0015_alter_outstandingtoken_expires_at"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="outstandingtoken",
+            options={
+                "verbose_name": "Outstanding Token",
+                "verbose_name_plural": "Outstanding Tokens",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="outstandingtoken",
+            index=models.Index(
+                fields=["user", "expires_at"], name="outstanding_user_expires_idx"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="outstandingtoken",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
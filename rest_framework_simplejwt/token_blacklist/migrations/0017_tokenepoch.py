@@ -0,0 +1,35 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("token_blacklist", "0016_outstandingtoken_user_expires_at_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TokenEpoch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(primary_key=True, serialize=False),
+                ),
+                ("epoch", models.PositiveIntegerField(default=0)),
+                ("revoked_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Token Epoch",
+                "verbose_name_plural": "Token Epochs",
+            },
+        ),
+    ]
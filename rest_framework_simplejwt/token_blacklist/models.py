@@ -1,19 +1,99 @@
+from typing import Any
+
 from django.conf import settings
-from django.db import models
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models.constants import OnConflict
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from ..settings import api_settings
+
+
+class OutstandingTokenManager(models.Manager):
+    def user_pk(self, user_id: Any) -> models.Subquery | None:
+        """
+        Returns an expression which resolves the given value of the
+        `USER_ID_FIELD` to the primary key of the matching user, or to NULL if
+        there is none, when it is saved.  This allows setting the user of an
+        outstanding token without fetching the user first.
+        """
+        if user_id is None:
+            return None
+
+        User = get_user_model()
+        return models.Subquery(
+            User._default_manager.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).values("pk")[:1]
+        )
+
+    def insert(self, token: "OutstandingToken") -> "OutstandingToken":
+        """
+        Saves the given outstanding token unless one with the same jti already
+        exists.  Uses a single ``INSERT ... ON CONFLICT DO NOTHING`` statement
+        on databases which support it, in which case the primary key of the
+        given instance is left unset.
+        """
+        if connections[self.db].features.supports_ignore_conflicts:
+            self.bulk_create([token], ignore_conflicts=True)
+        else:
+            token, _ = self.get_or_insert(token)
+
+        return token
+
+    def get_or_insert(
+        self, token: "OutstandingToken"
+    ) -> tuple["OutstandingToken", bool]:
+        """
+        Like `get_or_create`, returns the saved outstanding token with the
+        jti of the given one, saving the given one if there is none, and
+        whether it was saved.  Its user is read back once saved if it was
+        given by `user_pk`.
+        """
+        token, created = self.get_or_create(
+            jti=token.jti,
+            defaults={
+                f.attname: getattr(token, f.attname)
+                for f in token._meta.concrete_fields
+                if not f.primary_key and f.attname != "jti"
+            },
+        )
+        if created and hasattr(token.user_id, "resolve_expression"):
+            token.refresh_from_db(fields=["user"])
+
+        return token, created
+
+    def insert_many(self, tokens: list["OutstandingToken"]) -> None:
+        """
+        Saves those of the given outstanding tokens whose jti doesn't exist
+        yet, with a single statement on databases which support it.
+        """
+        if connections[self.db].features.supports_ignore_conflicts:
+            self.bulk_create(tokens, ignore_conflicts=True)
+        else:
+            for token in tokens:
+                self.insert(token)
+
 
 class OutstandingToken(models.Model):
     id = models.BigAutoField(primary_key=True, serialize=False)
+    # The (user, expires_at) index in Meta also serves lookups by user alone.
     user = models.ForeignKey(
-        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
     )
 
     jti = models.CharField(unique=True, max_length=255)
     token = models.TextField()
 
     created_at = models.DateTimeField(null=True, blank=True)
-    expires_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = OutstandingTokenManager()
 
     class Meta:
         verbose_name = _("Outstanding Token")
@@ -26,7 +106,11 @@ class OutstandingToken(models.Model):
         abstract = (
             "rest_framework_simplejwt.token_blacklist" not in settings.INSTALLED_APPS
         )
-        ordering = ("user",)
+        indexes = [
+            models.Index(
+                fields=["user", "expires_at"], name="outstanding_user_expires_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return _("Token for %(user)s (%(jti)s)") % {
@@ -35,12 +119,96 @@ class OutstandingToken(models.Model):
         }
 
 
+class BlacklistedTokenManager(models.Manager):
+    # Attempts at blacklisting tokens on databases which can't ignore
+    # conflicts, each skipping tokens blacklisted concurrently by the previous
+    max_revoke_attempts = 3
+
+    def revoke_where(self, queryset: models.QuerySet) -> int:
+        """
+        Blacklists every token in the given `OutstandingToken` queryset which
+        isn't blacklisted yet with a single ``INSERT ... SELECT`` statement,
+        without loading the tokens.  Returns the number of tokens blacklisted.
+
+        Tokens blacklisted by another transaction at the same time are
+        skipped, with ``ON CONFLICT DO NOTHING`` or its equivalent on
+        databases which support it.  On other databases the statement is run
+        again, in a savepoint, when it conflicts.
+        """
+        connection = connections[self.db]
+
+        if connection.features.supports_ignore_conflicts:
+            with connection.cursor() as cursor:
+                cursor.execute(*self._revoke_where_sql(queryset, OnConflict.IGNORE))
+                return cursor.rowcount
+
+        for attempt in range(1, self.max_revoke_attempts + 1):
+            try:
+                with (
+                    transaction.atomic(using=self.db),
+                    connection.cursor() as cursor,
+                ):
+                    cursor.execute(*self._revoke_where_sql(queryset))
+                    return cursor.rowcount
+            except IntegrityError:
+                if attempt == self.max_revoke_attempts:
+                    raise
+
+        return 0
+
+    def _revoke_where_sql(
+        self, queryset: models.QuerySet, on_conflict: OnConflict | None = None
+    ) -> tuple[str, tuple[Any, ...]]:
+        ops = connections[self.db].ops
+        quote_name = ops.quote_name
+        opts = self.model._meta
+
+        select = (
+            queryset.using(self.db)
+            .filter(blacklistedtoken__isnull=True)
+            .order_by()
+            .annotate(
+                _blacklisted_at=models.Value(
+                    timezone.now(), output_field=models.DateTimeField()
+                )
+            )
+            .values_list("pk", "jti", "_blacklisted_at")
+        )
+        select_sql, params = select.query.get_compiler(self.db).as_sql()
+
+        fields = [opts.get_field(name) for name in ("token", "jti", "blacklisted_at")]
+        columns = ", ".join(quote_name(field.column) for field in fields)
+
+        sql = " ".join(
+            part
+            for part in (
+                ops.insert_statement(on_conflict=on_conflict),
+                f"{quote_name(opts.db_table)} ({columns}) {select_sql}",
+                ops.on_conflict_suffix_sql(fields, on_conflict, None, None),
+            )
+            if part
+        )
+
+        return sql, params
+
+    def revoke_for_user(self, user: Any) -> int:
+        """
+        Blacklists all outstanding tokens of the given user.
+        """
+        return self.revoke_where(OutstandingToken.objects.filter(user=user))
+
+
 class BlacklistedToken(models.Model):
     id = models.BigAutoField(primary_key=True, serialize=False)
     token = models.OneToOneField(OutstandingToken, on_delete=models.CASCADE)
 
+    # Copy of `token.jti` so that blacklist checks don't need a join
+    jti = models.CharField(unique=True, max_length=255, editable=False)
+
     blacklisted_at = models.DateTimeField(auto_now_add=True)
 
+    objects = BlacklistedTokenManager()
+
     class Meta:
         verbose_name = _("Blacklisted Token")
         verbose_name_plural = _("Blacklisted Tokens")
@@ -55,3 +223,87 @@ class BlacklistedToken(models.Model):
 
     def __str__(self) -> str:
         return _("Blacklisted token for %(user)s") % {"user": self.token.user}
+
+    def save(self, *args, **kwargs) -> None:
+        if not self.jti:
+            self.jti = self.token.jti
+
+        super().save(*args, **kwargs)
+
+
+class RevokedTokenManager(models.Manager):
+    def insert_many(self, tokens: list["RevokedToken"]) -> None:
+        """
+        Saves those of the given revoked tokens whose jti doesn't exist yet,
+        with a single statement on databases which support it.
+        """
+        if connections[self.db].features.supports_ignore_conflicts:
+            self.bulk_create(tokens, ignore_conflicts=True)
+        else:
+            for token in tokens:
+                self.get_or_create(
+                    jti=token.jti, defaults={"expires_at": token.expires_at}
+                )
+
+
+class RevokedToken(models.Model):
+    """
+    A revoked token stored by its id and expiration time only, without an
+    `OutstandingToken` row.  Used by `JtiRevocationBackend`.
+    """
+
+    id = models.BigAutoField(primary_key=True, serialize=False)
+    jti = models.CharField(unique=True, max_length=255)
+    expires_at = models.DateTimeField(db_index=True)
+
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    objects = RevokedTokenManager()
+
+    class Meta:
+        verbose_name = _("Revoked Token")
+        verbose_name_plural = _("Revoked Tokens")
+        # Work around for a bug in Django:
+        # https://code.djangoproject.com/ticket/19422
+        #
+        # Also see corresponding ticket:
+        # https://github.com/encode/django-rest-framework/issues/705
+        abstract = (
+            "rest_framework_simplejwt.token_blacklist" not in settings.INSTALLED_APPS
+        )
+
+    def __str__(self) -> str:
+        return _("Revoked token %(jti)s") % {"jti": self.jti}
+
+
+class TokenEpoch(models.Model):
+    """
+    A counter incremented each time all the tokens of a user are revoked.
+    Tokens carry the value it had when they were issued, in the claim named
+    by the `TOKEN_EPOCH_CLAIM` setting, and are rejected once it is lower
+    than this one when the `CHECK_TOKEN_EPOCH` setting is enabled.
+    """
+
+    id = models.BigAutoField(primary_key=True, serialize=False)
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+
+    epoch = models.PositiveIntegerField(default=0)
+    revoked_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Token Epoch")
+        verbose_name_plural = _("Token Epochs")
+        # Work around for a bug in Django:
+        # https://code.djangoproject.com/ticket/19422
+        #
+        # Also see corresponding ticket:
+        # https://github.com/encode/django-rest-framework/issues/705
+        abstract = (
+            "rest_framework_simplejwt.token_blacklist" not in settings.INSTALLED_APPS
+        )
+
+    def __str__(self) -> str:
+        return _("Tokens of %(user)s revoked at %(revoked_at)s") % {
+            "user": self.user,
+            "revoked_at": self.revoked_at,
+        }
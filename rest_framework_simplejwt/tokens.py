@@ -1,11 +1,15 @@
+import copy
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import TYPE_CHECKING, Any, Generic, Optional, TypeVar
 from uuid import uuid4
 
+import jwt
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AbstractBaseUser
-from django.utils.module_loading import import_string
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 
 from .exceptions import (
@@ -16,11 +20,14 @@ from .exceptions import (
 )
 from .models import TokenUser
 from .settings import api_settings
-from .token_blacklist.models import BlacklistedToken, OutstandingToken
+from .token_blacklist.backends import get_revocation_backend
+from .token_blacklist.epochs import get_token_epoch
+from .token_blacklist.models import OutstandingToken
 from .utils import (
     aware_utcnow,
     datetime_from_epoch,
     datetime_to_epoch,
+    datetime_to_timestamp,
     format_lazy,
     get_md5_hash_password,
     logger,
@@ -43,6 +50,14 @@ class Token:
     token_type: str | None = None
     lifetime: timedelta | None = None
 
+    # Claims, besides "exp" and the id and type claims, which `verify`
+    # requires tokens of this class to have
+    required_claims: tuple[str, ...] = ()
+
+    # Encoded form of the token and the payload it was encoded from
+    _encoded: str | None = None
+    _encoded_payload: dict[str, Any] | None = None
+
     def __init__(self, token: Optional["Token"] = None, verify: bool = True) -> None:
         """
         !!!! IMPORTANT !!!! MUST raise a TokenError with a user-facing error
@@ -58,28 +73,136 @@ class Token:
         # Set up token
         if token is not None:
             # An encoded token was provided
-            token_backend = self.get_token_backend()
-
-            # Decode token
-            try:
-                self.payload = token_backend.decode(token, verify=verify)
-            except TokenBackendExpiredToken as e:
-                raise ExpiredTokenError(_("Token is expired")) from e
-            except TokenBackendError as e:
-                raise TokenError(_("Token is invalid")) from e
+            self.payload = self.decode(token, verify=verify)
 
             if verify:
                 self.verify()
+                self.set_encoded(token)
         else:
             # New token.  Skip all the verification steps.
             self.payload = {api_settings.TOKEN_TYPE_CLAIM: self.token_type}
+            self.set_initial_claims()
 
-            # Set "exp" and "iat" claims with default value
-            self.set_exp(from_time=self.current_time, lifetime=self.lifetime)
-            self.set_iat(at_time=self.current_time)
+    def set_initial_claims(self) -> None:
+        """
+        Sets the claims of a new token.  Override this, rather than
+        `__init__`, to add claims to new tokens so that validated tokens can
+        still be built without calling `__init__`.
+        """
+        # Set "exp" and "iat" claims with default value
+        self.set_exp(from_time=self.current_time, lifetime=self.lifetime)
+        self.set_iat(at_time=self.current_time)
 
-            # Set "jti" claim
-            self.set_jti()
+        # Set "jti" claim
+        self.set_jti()
+
+    @classmethod
+    def from_token(
+        cls: type[T],
+        token: "Token",
+        decoded: dict["TokenBackend", Any] | None = None,
+    ) -> T:
+        """
+        Decodes and validates the given encoded token, like `cls(token)`.
+
+        When validating the same token as one of several token classes, pass
+        the same `decoded` dict for each of them.  The payload, or the error,
+        from the token backend is kept there so that the token is decoded and
+        its signature checked only once per backend, and a token of another
+        type is rejected before the checks of `verify`, which may query the
+        database, are run.
+
+        Token classes which override `__init__` are built with it, so that
+        any state it sets up is there.  The token is then decoded again, and
+        `decoded` is only used to reject tokens of another type early.
+        """
+        if cls.__init__ is not Token.__init__:
+            if decoded is not None:
+                cls._from_encoded(token, decoded)
+            return cls(token)
+
+        validated_token = cls._from_encoded(token, decoded)
+        validated_token.verify()
+        validated_token.set_encoded(token)
+
+        return validated_token
+
+    @classmethod
+    async def afrom_token(
+        cls: type[T],
+        token: "Token",
+        decoded: dict["TokenBackend", Any] | None = None,
+    ) -> T:
+        """
+        Async counterpart of `from_token`, awaiting `averify` so that checks
+        which query the database don't block the event loop.
+        """
+        if cls.__init__ is not Token.__init__:
+            if decoded is not None:
+                cls._from_encoded(token, decoded)
+            return await sync_to_async(cls)(token)
+
+        validated_token = cls._from_encoded(token, decoded)
+        await validated_token.averify()
+        validated_token.set_encoded(token)
+
+        return validated_token
+
+    @classmethod
+    def _from_encoded(
+        cls: type[T],
+        token: "Token",
+        decoded: dict["TokenBackend", Any] | None = None,
+    ) -> T:
+        if cls.token_type is None or cls.lifetime is None:
+            raise TokenError(_("Cannot create token with no type or lifetime"))
+
+        validated_token = cls.__new__(cls)
+        validated_token.token = token
+        validated_token.current_time = aware_utcnow()
+
+        if decoded is None:
+            validated_token.payload = validated_token.decode(token)
+        else:
+            token_backend = validated_token.get_token_backend()
+            if token_backend not in decoded:
+                try:
+                    decoded[token_backend] = validated_token.decode(token)
+                except TokenError as e:
+                    decoded[token_backend] = e
+
+            payload = decoded[token_backend]
+            if isinstance(payload, TokenError):
+                raise type(payload)(*payload.args)
+
+            validated_token.payload = payload.copy()
+
+            if api_settings.TOKEN_TYPE_CLAIM is not None:
+                validated_token.verify_token_type()
+
+        return validated_token
+
+    def decode(self, token: "Token", verify: bool = True) -> dict[str, Any]:
+        """
+        Decodes the given encoded token with the token backend.  Raises a
+        TokenError with a user-facing error message if it can't be decoded.
+        """
+        try:
+            return self.get_token_backend().decode(token, verify=verify)
+        except TokenBackendExpiredToken as e:
+            raise ExpiredTokenError(_("Token is expired")) from e
+        except TokenBackendError as e:
+            raise TokenError(_("Token is invalid")) from e
+
+    def set_encoded(self, token: "Token") -> None:
+        """
+        Records the given token as the encoded form of the current payload so
+        that it is returned by `str` without signing the payload again.
+        """
+        if isinstance(token, bytes):
+            token = token.decode("utf-8")
+        self._encoded = token
+        self._encoded_payload = copy.deepcopy(self.payload)
 
     def __repr__(self) -> str:
         return repr(self.payload)
@@ -89,9 +212,11 @@ class Token:
 
     def __setitem__(self, key: str, value: Any) -> None:
         self.payload[key] = value
+        self._encoded = None
 
     def __delitem__(self, key: str) -> None:
         del self.payload[key]
+        self._encoded = None
 
     def __contains__(self, key: str) -> Any:
         return key in self.payload
@@ -101,9 +226,15 @@ class Token:
 
     def __str__(self) -> str:
         """
-        Signs and returns a token as a base64 encoded string.
+        Signs and returns a token as a base64 encoded string.  The encoded
+        token is reused until the payload is changed, including in place
+        changes to nested claims.
         """
-        return self.get_token_backend().encode(self.payload)
+        if self._encoded is None or self._encoded_payload != self.payload:
+            self._encoded_payload = copy.deepcopy(self.payload)
+            self._encoded = self.get_token_backend().encode(self.payload)
+
+        return self._encoded
 
     def verify(self) -> None:
         """
@@ -129,6 +260,18 @@ class Token:
         if api_settings.TOKEN_TYPE_CLAIM is not None:
             self.verify_token_type()
 
+        for claim in self.required_claims:
+            if claim not in self.payload:
+                raise TokenError(format_lazy(_("Token has no '{}' claim"), claim))
+
+    async def averify(self) -> None:
+        """
+        Async counterpart of `verify`.  The base checks don't do any I/O, so
+        this only needs to be overridden to await checks that do.  Subclasses
+        which override `verify` with such checks must override both.
+        """
+        self.verify()
+
     def verify_token_type(self) -> None:
         """
         Ensures that the token type claim is present and has the correct value.
@@ -151,6 +294,7 @@ class Token:
         https://tools.ietf.org/html/rfc7519#section-4.1.7
         """
         self.payload[api_settings.JTI_CLAIM] = uuid4().hex
+        self._encoded = None
 
     def set_exp(
         self,
@@ -171,6 +315,7 @@ class Token:
             lifetime = self.lifetime
 
         self.payload[claim] = datetime_to_epoch(from_time + lifetime)
+        self._encoded = None
 
     def set_iat(self, claim: str = "iat", at_time: datetime | None = None) -> None:
         """
@@ -183,6 +328,7 @@ class Token:
             at_time = self.current_time
 
         self.payload[claim] = datetime_to_epoch(at_time)
+        self._encoded = None
 
     def check_exp(
         self, claim: str = "exp", current_time: datetime | None = None
@@ -200,9 +346,9 @@ class Token:
         except KeyError as e:
             raise TokenError(format_lazy(_("Token has no '{}' claim"), claim)) from e
 
-        claim_time = datetime_from_epoch(claim_value)
+        # Compared as timestamps, which is cheaper than building a datetime
         leeway = self.get_token_backend().get_leeway()
-        if claim_time <= current_time - leeway:
+        if claim_value <= datetime_to_timestamp(current_time) - leeway.total_seconds():
             raise TokenError(format_lazy(_("Token '{}' claim has expired"), claim))
 
     def outstand(self) -> OutstandingToken | None:
@@ -212,6 +358,15 @@ class Token:
         """
         return None
 
+    def rotate(self, user: AuthUser | None = None) -> None:
+        """
+        Turns this token into a new token for the same user, with a new id,
+        expiration and issue time.  Used when refresh tokens are rotated.
+        """
+        self.set_jti()
+        self.set_exp()
+        self.set_iat()
+
     @classmethod
     def for_user(cls: type[T], user: AuthUser) -> T:
         """
@@ -235,17 +390,65 @@ class Token:
                 user.password
             )
 
+        if api_settings.CHECK_TOKEN_EPOCH:
+            token[api_settings.TOKEN_EPOCH_CLAIM] = get_token_epoch(
+                user_id, cached=False
+            )
+
+        if api_settings.USER_PERMISSIONS_CLAIM is not None:
+            # Superusers have every permission, so there's no need to list them
+            if getattr(user, "is_superuser", False):
+                token["is_superuser"] = True
+            else:
+                token[api_settings.USER_PERMISSIONS_CLAIM] = sorted(
+                    user.get_all_permissions()
+                )
+
+        if api_settings.USER_GROUPS_CLAIM is not None:
+            token[api_settings.USER_GROUPS_CLAIM] = sorted(
+                user.groups.values_list("name", flat=True)
+            )
+
         return token
 
+    @classmethod
+    def for_users(
+        cls: type[T], users: Iterable[AuthUser], max_workers: int | None = None
+    ) -> list[T]:
+        """
+        Returns an authorization token for each of the given users, in order.
+
+        Tokens are signed before being returned.  If `max_workers` is given,
+        they are signed in a pool of that many threads, which speeds up
+        issuance with algorithms whose signing releases the GIL (the RSA and
+        ECDSA algorithms provided by `cryptography`).
+        """
+        tokens = [cls.for_user(user) for user in users]
+        _encode_tokens(tokens, max_workers)
+
+        return tokens
+
     _token_backend: Optional["TokenBackend"] = None
 
     @property
     def token_backend(self) -> "TokenBackend":
-        if self._token_backend is None:
-            self._token_backend = import_string(
-                "rest_framework_simplejwt.state.token_backend"
-            )
-        return self._token_backend
+        """
+        The backend for this token class's type, looked up in the registry of
+        `rest_framework_simplejwt.state` once per class.
+        """
+        if self._token_backend is not None:
+            return self._token_backend
+
+        token_class = type(self)
+        try:
+            return _class_token_backends[token_class]
+        except KeyError:
+            from . import state
+
+            token_backend = state.get_token_backend(token_class.token_type)
+            _class_token_backends[token_class] = token_backend
+
+            return token_backend
 
     def get_token_backend(self) -> "TokenBackend":
         # Backward compatibility.
@@ -263,9 +466,13 @@ class BlacklistMixin(Generic[T]):
     payload: dict[str, Any]
 
     if "rest_framework_simplejwt.token_blacklist" in settings.INSTALLED_APPS:
+        # Set while `averify` runs `verify`, the blacklist having already been
+        # checked without blocking
+        _blacklist_checked = False
 
         def verify(self, *args, **kwargs) -> None:
-            self.check_blacklist()
+            if not self._blacklist_checked:
+                self.check_blacklist()
 
             super().verify(*args, **kwargs)  # type: ignore
 
@@ -276,67 +483,115 @@ class BlacklistMixin(Generic[T]):
             """
             jti = self.payload[api_settings.JTI_CLAIM]
 
-            if BlacklistedToken.objects.filter(token__jti=jti).exists():
+            if get_revocation_backend().is_revoked(jti):
                 raise TokenError(_("Token is blacklisted"))
 
-        def blacklist(self) -> BlacklistedToken:
+        async def averify(self, *args, **kwargs) -> None:
             """
-            Ensures this token is included in the outstanding token list and
-            adds it to the blacklist.
+            Checks the blacklist with `acheck_blacklist`, then runs `verify`,
+            including any checks added by overriding it, without checking the
+            blacklist again.
             """
-            jti = self.payload[api_settings.JTI_CLAIM]
-            exp = self.payload["exp"]
-            user_id = self.payload.get(api_settings.USER_ID_CLAIM)
-            User = get_user_model()
+            await self.acheck_blacklist()
+
+            self._blacklist_checked = True
             try:
-                user = User.objects.get(**{api_settings.USER_ID_FIELD: user_id})
-            except User.DoesNotExist:
-                user = None
+                self.verify(*args, **kwargs)
+            finally:
+                self._blacklist_checked = False
 
-            # Ensure outstanding token exists with given jti
-            token, _ = OutstandingToken.objects.get_or_create(
-                jti=jti,
-                defaults={
-                    "user": user,
-                    "created_at": self.current_time,
-                    "token": str(self),
-                    "expires_at": datetime_from_epoch(exp),
-                },
-            )
+        async def acheck_blacklist(self) -> None:
+            """
+            Async counterpart of `check_blacklist`.
+            """
+            jti = self.payload[api_settings.JTI_CLAIM]
+
+            if await get_revocation_backend().ais_revoked(jti):
+                raise TokenError(_("Token is blacklisted"))
 
-            return BlacklistedToken.objects.get_or_create(token=token)
+        def blacklist(self) -> Any:
+            """
+            Adds this token to the blacklist through the configured revocation
+            backend and returns what its `revoke_token` returns.  The default
+            backend also ensures this token is included in the outstanding
+            token list and returns a `(BlacklistedToken, created)` tuple, while
+            `JtiRevocationBackend` and `CacheRevocationBackend` return `None`.
+            """
+            return get_revocation_backend().revoke_token(self)
 
-        def outstand(self) -> OutstandingToken | None:
+        async def ablacklist(self) -> Any:
+            """
+            Async counterpart of `blacklist`.
+            """
+            return await get_revocation_backend().arevoke_token(self)
+
+        def outstand(self) -> tuple[OutstandingToken, bool]:
             """
             Ensures this token is included in the outstanding token list and
-            adds it to the outstanding token list if not.
+            adds it to the outstanding token list if not.  Returns the saved
+            outstanding token and whether it was added, like `get_or_create`.
             """
-            jti = self.payload[api_settings.JTI_CLAIM]
-            exp = self.payload["exp"]
-            user_id = self.payload.get(api_settings.USER_ID_CLAIM)
-            User = get_user_model()
-            try:
-                user = User.objects.get(**{api_settings.USER_ID_FIELD: user_id})
-            except User.DoesNotExist:
-                user = None
+            return OutstandingToken.objects.get_or_insert(self.outstanding_token())
 
-            # Ensure outstanding token exists with given jti
-            return OutstandingToken.objects.get_or_create(
-                jti=jti,
-                defaults={
-                    "user": user,
-                    "created_at": self.current_time,
-                    "token": str(self),
-                    "expires_at": datetime_from_epoch(exp),
-                },
+        def outstanding_token(self, user: AuthUser | None = None) -> OutstandingToken:
+            """
+            Returns an unsaved outstanding token for this token.  Unless the
+            user of this token is given, it is resolved from the user id claim
+            when the outstanding token is saved.
+            """
+            return OutstandingToken(
+                jti=self.payload[api_settings.JTI_CLAIM],
+                user_id=(
+                    user.pk
+                    if user is not None
+                    else OutstandingToken.objects.user_pk(
+                        self.payload.get(api_settings.USER_ID_CLAIM)
+                    )
+                ),
+                token=str(self),
+                created_at=self.current_time,
+                expires_at=datetime_from_epoch(self.payload["exp"]),
             )
 
+        def rotate(self, user: AuthUser | None = None) -> None:
+            """
+            Also adds the new token to the outstanding token list and, if the
+            `BLACKLIST_AFTER_ROTATION` setting is enabled, blacklists the old
+            token.  Both tokens are added to the outstanding token list with
+            one statement, in the same transaction as the blacklisting.
+            """
+            backend = get_revocation_backend()
+            blacklist = api_settings.BLACKLIST_AFTER_ROTATION
+
+            if not backend.outstand_tokens:
+                jti, exp = self.payload[api_settings.JTI_CLAIM], self.payload["exp"]
+                super().rotate(user)  # type: ignore
+
+                if blacklist:
+                    backend.revoke(jti, exp)
+                return
+
+            old_token = self.outstanding_token(user) if blacklist else None
+
+            super().rotate(user)  # type: ignore
+            new_token = self.outstanding_token(user)
+
+            with transaction.atomic():
+                if old_token is not None:
+                    OutstandingToken.objects.insert_many([old_token, new_token])
+                    backend.revoke_outstanding_token(old_token)
+                else:
+                    OutstandingToken.objects.insert(new_token)
+
         @classmethod
         def for_user(cls: type[T], user: AuthUser) -> T:
             """
-            Adds this token to the outstanding token list.
+            Adds this token to the outstanding token list, if the revocation
+            backend uses it.
             """
             token = super().for_user(user)  # type: ignore
+            if not get_revocation_backend().outstand_tokens:
+                return token
 
             jti = token[api_settings.JTI_CLAIM]
             exp = token["exp"]
@@ -351,21 +606,76 @@ class BlacklistMixin(Generic[T]):
 
             return token
 
+        @classmethod
+        def for_users(
+            cls: type[T],
+            users: Iterable[AuthUser],
+            max_workers: int | None = None,
+            batch_size: int | None = 1000,
+        ) -> list[T]:
+            """
+            Returns a token for each of the given users and adds all of them to
+            the outstanding token list with bulk inserts of up to `batch_size`
+            rows.
+            """
+            if not get_revocation_backend().outstand_tokens:
+                return super().for_users(users, max_workers)  # type: ignore
+
+            tokens = []
+            outstanding_users = []
+            for user in users:
+                tokens.append(super().for_user(user))  # type: ignore
+                outstanding_users.append(user)
+
+            _encode_tokens(tokens, max_workers)
+
+            OutstandingToken.objects.bulk_create(
+                (
+                    OutstandingToken(
+                        user=user,
+                        jti=token[api_settings.JTI_CLAIM],
+                        token=str(token),
+                        created_at=token.current_time,
+                        expires_at=datetime_from_epoch(token["exp"]),
+                    )
+                    for user, token in zip(outstanding_users, tokens)
+                ),
+                batch_size=batch_size,
+            )
+
+            return tokens
+
+
+_class_token_backends: dict[type[Token], "TokenBackend"] = {}
+
+
+def _encode_tokens(tokens: Sequence[Token], max_workers: int | None = None) -> None:
+    """
+    Signs the given tokens, in a pool of `max_workers` threads if given, so
+    that their encoded form is memoized.
+    """
+    if max_workers is None or len(tokens) < 2:
+        for token in tokens:
+            str(token)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for _ in executor.map(str, tokens):
+                pass
+
 
 class SlidingToken(BlacklistMixin["SlidingToken"], Token):
     token_type = "sliding"
     lifetime = api_settings.SLIDING_TOKEN_LIFETIME
 
-    def __init__(self, *args, **kwargs) -> None:
-        super().__init__(*args, **kwargs)
+    def set_initial_claims(self) -> None:
+        super().set_initial_claims()
 
-        if self.token is None:
-            # Set sliding refresh expiration claim if new token
-            self.set_exp(
-                api_settings.SLIDING_TOKEN_REFRESH_EXP_CLAIM,
-                from_time=self.current_time,
-                lifetime=api_settings.SLIDING_TOKEN_REFRESH_LIFETIME,
-            )
+        # Set sliding refresh expiration claim
+        self.set_exp(
+            api_settings.SLIDING_TOKEN_REFRESH_EXP_CLAIM,
+            from_time=self.current_time,
+            lifetime=api_settings.SLIDING_TOKEN_REFRESH_LIFETIME,
+        )
 
 
 class AccessToken(Token):
@@ -417,6 +727,29 @@ class UntypedToken(Token):
     token_type = "untyped"
     lifetime = timedelta(seconds=0)
 
+    @property
+    def token_backend(self) -> "TokenBackend":
+        """
+        When `TOKEN_BACKENDS` configures backends for specific token types,
+        untyped tokens are decoded with the backend for the type given by
+        their (unverified) token type claim.
+        """
+        if self._token_backend is None:
+            from . import state
+
+            token_type = None
+            if state.token_backends and self.token is not None:
+                try:
+                    token_type = jwt.decode(
+                        self.token, options={"verify_signature": False}
+                    ).get(api_settings.TOKEN_TYPE_CLAIM)
+                except jwt.InvalidTokenError:
+                    pass
+
+            self._token_backend = state.get_token_backend(token_type)
+
+        return self._token_backend
+
     def verify_token_type(self) -> None:
         """
         Untyped tokens do not verify the "token_type" claim.  This is useful
@@ -5,6 +5,8 @@ from collections.abc import Callable
 from datetime import datetime, timezone
 
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
 from django.utils.functional import lazy
 
 
@@ -15,6 +17,14 @@ def get_md5_hash_password(password: str) -> str:
     return hashlib.md5(password.encode()).hexdigest().upper()
 
 
+def default_user_queryset() -> QuerySet:
+    """
+    Returns the queryset users are looked up in when they are authenticated
+    with a token or when a token is refreshed.
+    """
+    return get_user_model().objects.all()
+
+
 def make_utc(dt: datetime) -> datetime:
     if settings.USE_TZ and dt.tzinfo is None:
         return dt.replace(tzinfo=timezone.utc)
@@ -34,6 +44,18 @@ def datetime_to_epoch(dt: datetime) -> int:
     return timegm(dt.utctimetuple())
 
 
+def datetime_to_timestamp(dt: datetime) -> float:
+    """
+    Returns the unix timestamp of the given datetime, which is taken to be in
+    UTC if it is naive.  Unlike `datetime_to_epoch`, fractions of a second are
+    kept.
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+
+    return dt.timestamp()
+
+
 def datetime_from_epoch(ts: float) -> datetime:
     dt = datetime.fromtimestamp(ts, tz=timezone.utc)
     if not settings.USE_TZ:
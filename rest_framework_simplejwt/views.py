@@ -1,5 +1,6 @@
 from typing import Optional
 
+from asgiref.sync import sync_to_async
 from django.utils.module_loading import import_string
 from rest_framework import generics, status
 from rest_framework.request import Request
@@ -120,3 +121,71 @@ class TokenBlacklistView(TokenViewBase):
 
 
 token_blacklist = TokenBlacklistView.as_view()
+
+
+class AsyncTokenViewBase(TokenViewBase):
+    """
+    An async variant of `TokenViewBase` for projects served over ASGI.  The
+    inherited `dispatch`, including the serializer validation which may hash
+    passwords or query the database, runs in a thread so that the event loop
+    is never blocked.
+    """
+
+    view_is_async = True
+
+    async def dispatch(self, request: Request, *args, **kwargs) -> Response:
+        return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+
+class AsyncTokenObtainPairView(AsyncTokenViewBase, TokenObtainPairView):
+    """
+    Async variant of `TokenObtainPairView`.
+    """
+
+
+async_token_obtain_pair = AsyncTokenObtainPairView.as_view()
+
+
+class AsyncTokenRefreshView(AsyncTokenViewBase, TokenRefreshView):
+    """
+    Async variant of `TokenRefreshView`.
+    """
+
+
+async_token_refresh = AsyncTokenRefreshView.as_view()
+
+
+class AsyncTokenObtainSlidingView(AsyncTokenViewBase, TokenObtainSlidingView):
+    """
+    Async variant of `TokenObtainSlidingView`.
+    """
+
+
+async_token_obtain_sliding = AsyncTokenObtainSlidingView.as_view()
+
+
+class AsyncTokenRefreshSlidingView(AsyncTokenViewBase, TokenRefreshSlidingView):
+    """
+    Async variant of `TokenRefreshSlidingView`.
+    """
+
+
+async_token_refresh_sliding = AsyncTokenRefreshSlidingView.as_view()
+
+
+class AsyncTokenVerifyView(AsyncTokenViewBase, TokenVerifyView):
+    """
+    Async variant of `TokenVerifyView`.
+    """
+
+
+async_token_verify = AsyncTokenVerifyView.as_view()
+
+
+class AsyncTokenBlacklistView(AsyncTokenViewBase, TokenBlacklistView):
+    """
+    Async variant of `TokenBlacklistView`.
+    """
+
+
+async_token_blacklist = AsyncTokenBlacklistView.as_view()
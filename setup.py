@@ -7,6 +7,7 @@ extras_require = {
     "test": [
         "cryptography",
         "freezegun",
+        "orjson",
         "pytest-cov",
         "pytest-django",
         "pytest-xdist",
@@ -42,6 +43,9 @@ extras_require = {
     "crypto": [
         "cryptography>=3.3.1",
     ],
+    "orjson": [
+        "orjson>=3.0",
+    ],
 }
 
 extras_require["dev"] = (
@@ -1,5 +1,7 @@
+import time
 from datetime import timedelta
 from importlib import reload
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase
@@ -9,6 +11,7 @@ from rest_framework_simplejwt import authentication
 from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
 from rest_framework_simplejwt.models import TokenUser
 from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.epochs import revoke_user_tokens
 from rest_framework_simplejwt.tokens import AccessToken, SlidingToken
 from rest_framework_simplejwt.utils import get_md5_hash_password
 
@@ -18,6 +21,10 @@ User = get_user_model()
 AuthToken = api_settings.AUTH_TOKEN_CLASSES[0]
 
 
+def user_queryset():
+    return User.objects.only("id", "is_active", "password")
+
+
 class TestJWTAuthentication(TestCase):
     def setUp(self):
         self.factory = APIRequestFactory()
@@ -132,6 +139,99 @@ class TestJWTAuthentication(TestCase):
         self.backend.get_validated_token(str(access_token))
         self.backend.get_validated_token(str(sliding_token))
 
+    @override_api_settings(
+        AUTH_TOKEN_CLASSES=(
+            "rest_framework_simplejwt.tokens.AccessToken",
+            "rest_framework_simplejwt.tokens.SlidingToken",
+        ),
+    )
+    def test_get_validated_token_decodes_token_once(self):
+        token_backend = AccessToken().token_backend
+        sliding_token = SlidingToken()
+        invalid_token = str(sliding_token)[:-1]
+
+        with patch.object(
+            token_backend, "decode", wraps=token_backend.decode
+        ) as decode:
+            validated_token = self.backend.get_validated_token(str(sliding_token))
+            self.assertIsInstance(validated_token, SlidingToken)
+            self.assertEqual(validated_token.payload, sliding_token.payload)
+            self.assertEqual(decode.call_count, 1)
+
+            decode.reset_mock()
+            with self.assertRaises(InvalidToken) as e:
+                self.backend.get_validated_token(invalid_token)
+            self.assertEqual(decode.call_count, 1)
+
+        self.assertEqual(
+            e.exception.detail["messages"],
+            [
+                {
+                    "token_class": "AccessToken",
+                    "token_type": "access",
+                    "message": "Token is invalid",
+                },
+                {
+                    "token_class": "SlidingToken",
+                    "token_type": "sliding",
+                    "message": "Token is invalid",
+                },
+            ],
+        )
+
+    @override_api_settings(AUTH_TOKEN_CACHE_SIZE=10)
+    def test_get_validated_token_with_token_cache(self):
+        token_cache = authentication.get_token_cache()
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+
+        auth_token = AuthToken()
+        auth_token["roles"] = ["user"]
+        token = str(auth_token)
+
+        validated_token = self.backend.get_validated_token(token)
+        self.assertIsNotNone(token_cache.get(token))
+
+        # Changes to the returned token should not alter the cached token
+        validated_token["foo"] = "bar"
+        validated_token["roles"].append("admin")
+
+        # Should not decode the token again if it was cached
+        with patch(
+            "rest_framework_simplejwt.backends.TokenBackend.decode"
+        ) as fake_decode:
+            cached_token = self.backend.get_validated_token(token)
+            fake_decode.assert_not_called()
+
+        self.assertEqual(cached_token.payload, auth_token.payload)
+
+        # Should return a copy that can't alter the cached token
+        cached_token["foo"] = "bar"
+        cached_token["roles"].append("admin")
+        self.assertEqual(
+            self.backend.get_validated_token(token).payload, auth_token.payload
+        )
+
+    @override_api_settings(AUTH_TOKEN_CACHE_SIZE=10)
+    def test_get_validated_token_with_token_cache_reverifies_claims(self):
+        token_cache = authentication.get_token_cache()
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+
+        # Cached tokens should still be rejected once they have expired
+        token = AuthToken()
+        token.set_exp(lifetime=-timedelta(days=1))
+        raw_token = str(token)
+        token_cache.set(raw_token, token, time.time() + 60)
+
+        with self.assertRaises(InvalidToken):
+            self.backend.get_validated_token(raw_token)
+
+        self.assertIsNone(token_cache.get(raw_token))
+
+    def test_get_token_cache_disabled_by_default(self):
+        self.assertIsNone(authentication.get_token_cache())
+
     def test_get_user(self):
         payload = {"some_other_id": "foo"}
 
@@ -161,6 +261,64 @@ class TestJWTAuthentication(TestCase):
         # Otherwise, should return correct user
         self.assertEqual(self.backend.get_user(payload).id, u.id)
 
+    @patch.object(authentication, "_user_cache", None)
+    @override_api_settings(USER_CACHE_TIMEOUT=timedelta(minutes=5))
+    def test_get_user_with_user_cache(self):
+        u = User.objects.create_user(username="markhamill")
+        payload = {api_settings.USER_ID_CLAIM: str(u.id)}
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.backend.get_user(payload), u)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(payload), u)
+
+        # Saving the user drops it from the cache
+        u.is_active = False
+        u.save()
+        with self.assertNumQueries(1):
+            with self.assertRaises(AuthenticationFailed):
+                self.backend.get_user(payload)
+        with self.assertNumQueries(0):
+            with self.assertRaises(AuthenticationFailed):
+                self.backend.get_user(payload)
+
+        u.delete()
+        with self.assertRaisesRegex(AuthenticationFailed, "User not found"):
+            self.backend.get_user(payload)
+
+    @patch.object(authentication, "_user_cache", None)
+    @override_api_settings(
+        USER_CACHE_TIMEOUT=timedelta(minutes=5), USER_CACHE_ALIAS="default"
+    )
+    def test_get_user_with_shared_user_cache(self):
+        u = User.objects.create_user(username="markhamill")
+        payload = {api_settings.USER_ID_CLAIM: str(u.id)}
+        self.addCleanup(authentication.get_user_cache().cache.clear)
+
+        with self.assertNumQueries(1):
+            self.backend.get_user(payload)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(payload), u)
+
+        u.save()
+        with self.assertNumQueries(1):
+            self.backend.get_user(payload)
+
+    @override_api_settings(USER_QUERYSET="tests.test_authentication.user_queryset")
+    def test_get_user_with_user_queryset(self):
+        u = User.objects.create_user(username="markhamill")
+        payload = {api_settings.USER_ID_CLAIM: str(u.id)}
+
+        with self.assertNumQueries(1):
+            user = self.backend.get_user(payload)
+
+        self.assertEqual(user, u)
+        self.assertIn("username", user.get_deferred_fields())
+        self.assertNotIn("is_active", user.get_deferred_fields())
+
+    def test_get_user_cache_disabled_by_default(self):
+        self.assertIsNone(authentication.get_user_cache())
+
     @override_api_settings(
         CHECK_USER_IS_ACTIVE=False,
     )
@@ -237,10 +395,120 @@ class TestJWTAuthentication(TestCase):
         self.assertEqual(auth_user.id, user.id)
 
 
+class TestAsyncJWTAuthentication(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.backend = authentication.AsyncJWTAuthentication()
+
+    async def test_aauthenticate(self):
+        user = await User.objects.acreate(username="markhamill")
+        token = AccessToken.for_user(user)
+
+        request = self.factory.get("/test-url/")
+        self.assertIsNone(await self.backend.aauthenticate(request))
+
+        request = self.factory.get("/test-url/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        auth_user, validated_token = await self.backend.aauthenticate(request)
+
+        self.assertEqual(auth_user, user)
+        self.assertEqual(validated_token.payload, token.payload)
+
+    async def test_aget_validated_token(self):
+        # Should raise InvalidToken if token not valid
+        token = AuthToken()
+        token.set_exp(lifetime=-timedelta(days=1))
+        with self.assertRaises(InvalidToken):
+            await self.backend.aget_validated_token(str(token))
+
+        # Otherwise, should return validated token
+        token.set_exp()
+        self.assertEqual(
+            (await self.backend.aget_validated_token(str(token))).payload,
+            token.payload,
+        )
+
+    async def test_aget_validated_token_checks_blacklist(self):
+        token = SlidingToken()
+        await token.ablacklist()
+
+        with override_api_settings(
+            AUTH_TOKEN_CLASSES=("rest_framework_simplejwt.tokens.SlidingToken",)
+        ):
+            with self.assertRaises(InvalidToken) as e:
+                await self.backend.aget_validated_token(str(token))
+
+        self.assertIn("blacklisted", str(e.exception.detail["messages"][0]))
+
+    async def test_aget_user(self):
+        payload = {"some_other_id": "foo"}
+
+        # Should raise error if no recognizable user identification
+        with self.assertRaises(InvalidToken):
+            await self.backend.aget_user(payload)
+
+        payload[api_settings.USER_ID_CLAIM] = 42
+
+        # Should raise exception if user not found
+        with self.assertRaises(AuthenticationFailed):
+            await self.backend.aget_user(payload)
+
+        u = await User.objects.acreate(username="markhamill")
+        u.is_active = False
+        await u.asave()
+
+        payload[api_settings.USER_ID_CLAIM] = getattr(u, api_settings.USER_ID_FIELD)
+
+        # Should raise exception if user is inactive
+        with self.assertRaises(AuthenticationFailed):
+            await self.backend.aget_user(payload)
+
+        u.is_active = True
+        await u.asave()
+
+        # Otherwise, should return correct user
+        self.assertEqual((await self.backend.aget_user(payload)).id, u.id)
+
+    @patch.object(authentication, "_user_cache", None)
+    async def test_aget_user_with_user_cache(self):
+        u = await User.objects.acreate(username="markhamill")
+        payload = {api_settings.USER_ID_CLAIM: str(u.id)}
+
+        # The settings override is sync, so it can't decorate an async test
+        with override_api_settings(
+            USER_CACHE_TIMEOUT=timedelta(minutes=5), USER_CACHE_ALIAS="default"
+        ):
+            self.addCleanup(authentication.get_user_cache().cache.clear)
+
+            self.assertEqual(await self.backend.aget_user(payload), u)
+
+            with patch.object(
+                self.backend, "get_user_queryset", side_effect=AssertionError
+            ):
+                self.assertEqual(await self.backend.aget_user(payload), u)
+
+
 class TestJWTStatelessUserAuthentication(TestCase):
     def setUp(self):
         self.backend = authentication.JWTStatelessUserAuthentication()
 
+    @override_api_settings(CHECK_TOKEN_EPOCH=True)
+    def test_authenticate_with_check_token_epoch(self):
+        user = User.objects.create_user(username="markhamill", password="password")
+        token = AccessToken.for_user(user)
+        request = APIRequestFactory().get(
+            "/test-url/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+        backends = (authentication.JWTAuthentication(), self.backend)
+        for backend in backends:
+            self.assertEqual(str(backend.authenticate(request)[0].id), str(user.id))
+
+        revoke_user_tokens(user)
+
+        for backend in backends:
+            with self.assertRaises(AuthenticationFailed):
+                backend.authenticate(request)
+
     def test_get_user(self):
         payload = {"some_other_id": "foo"}
 
@@ -1,6 +1,7 @@
 import builtins
 import uuid
 from datetime import datetime, timedelta
+from decimal import Decimal
 from importlib import reload
 from json import JSONEncoder
 from unittest import mock
@@ -12,7 +13,9 @@ from django.test import TestCase
 from jwt import PyJWS, algorithms
 from jwt import __version__ as jwt_version
 
+from rest_framework_simplejwt import codecs
 from rest_framework_simplejwt.backends import JWK_CLIENT_AVAILABLE, TokenBackend
+from rest_framework_simplejwt.codecs import JSONCodec, OrjsonCodec
 from rest_framework_simplejwt.exceptions import (
     TokenBackendError,
     TokenBackendExpiredToken,
@@ -51,6 +54,26 @@ class UUIDJSONEncoder(JSONEncoder):
         return super().default(obj)
 
 
+class DecimalJSONEncoder(JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return str(obj)
+        return super().default(obj)
+
+
+class CountingJSONCodec(JSONCodec):
+    dumps_calls = 0
+    loads_calls = 0
+
+    def dumps(self, obj):
+        self.dumps_calls += 1
+        return super().dumps(obj)
+
+    def loads(self, data):
+        self.loads_calls += 1
+        return super().loads(data)
+
+
 class TestTokenBackend(TestCase):
     def setUp(self):
         self.realimport = builtins.__import__
@@ -102,8 +125,9 @@ class TestTokenBackend(TestCase):
         self.assertEqual(backends.TokenBackend("HS256").jwks_client, None)
 
         builtins.__import__ = self.realimport
+        reload(backends)
 
-    @patch("jwt.encode", mock.Mock(return_value=b"test"))
+    @patch("jwt.PyJWT.encode", mock.Mock(return_value=b"test"))
     def test_token_encode_should_return_str_for_old_PyJWT(self):
         self.assertIsInstance(TokenBackend("HS256").encode({}), str)
 
@@ -305,7 +329,9 @@ class TestTokenBackend(TestCase):
         # Payload copied
         self.payload["exp"] = datetime_to_epoch(self.payload["exp"])
 
-        with patch("rest_framework_simplejwt.backends.PyJWKClient") as mock_jwk_module:
+        with patch(
+            "rest_framework_simplejwt.backends.JWKSKeyManager"
+        ) as mock_jwk_module:
             mock_jwk_client = mock.MagicMock()
             mock_signing_key = mock.MagicMock()
 
@@ -337,7 +363,9 @@ class TestTokenBackend(TestCase):
             headers={"kid": "230498151c214b788dd97f22b85410a5"},
         )
 
-        with patch("rest_framework_simplejwt.backends.PyJWKClient") as mock_jwk_module:
+        with patch(
+            "rest_framework_simplejwt.backends.JWKSKeyManager"
+        ) as mock_jwk_module:
             mock_jwk_client = mock.MagicMock()
 
             mock_jwk_module.return_value = mock_jwk_client
@@ -364,7 +392,7 @@ class TestTokenBackend(TestCase):
         def _decode(jwt, key, algorithms, options, audience, issuer, leeway):
             return pyjwt_without_rsa.decode(jwt, key, algorithms, options)
 
-        with patch.object(jwt, "decode", new=_decode):
+        with patch.object(self.rsa_token_backend._jwt, "decode", new=_decode):
             with self.assertRaisesRegex(
                 TokenBackendError, "Invalid algorithm specified"
             ):
@@ -407,3 +435,177 @@ class TestTokenBackend(TestCase):
         token = backend.encode(self.payload)
         decoded = backend.decode(token)
         self.assertEqual(decoded["uuid"], str(unique))
+
+    @pytest.mark.skipif(IS_OLD_JWT, reason="PyJWT 1.7.1 doesn't support codecs")
+    def test_json_codec(self):
+        for backend in (
+            TokenBackend("HS256", SECRET, json_codec=CountingJSONCodec),
+            TokenBackend(
+                "RS256", PRIVATE_KEY, PUBLIC_KEY, json_codec=CountingJSONCodec
+            ),
+        ):
+            token = backend.encode(self.payload)
+            self.assertEqual(backend.decode(token), self.payload)
+
+            self.assertEqual(backend.json_codec.dumps_calls, 1)
+            self.assertEqual(backend.json_codec.loads_calls, 1)
+
+    @pytest.mark.skipif(codecs.orjson is None, reason="orjson is not installed")
+    @pytest.mark.skipif(IS_OLD_JWT, reason="PyJWT 1.7.1 doesn't support codecs")
+    def test_orjson_codec(self):
+        backend = TokenBackend(
+            "HS256", SECRET, json_encoder=DecimalJSONEncoder, json_codec=OrjsonCodec
+        )
+        self.payload["amount"] = Decimal("1.50")
+        token = backend.encode(self.payload)
+
+        self.assertEqual(backend.decode(token), {"foo": "bar", "amount": "1.50"})
+        # Tokens are interchangeable with those of the default codec
+        default_backend = TokenBackend("HS256", SECRET, json_encoder=DecimalJSONEncoder)
+        self.assertEqual(default_backend.encode(self.payload), token)
+
+        # orjson serializes UUIDs without the help of the encoder
+        unique = uuid.uuid4()
+        token = backend.encode({"uuid": unique})
+        self.assertEqual(backend.decode(token), {"uuid": str(unique)})
+
+    def test_default_json_codec_uses_pyjwt(self):
+        self.assertIs(type(self.hmac_token_backend._jwt), jwt.PyJWT)
+
+    @pytest.mark.skipif(not IS_OLD_JWT, reason="PyJWT 2 supports codecs")
+    def test_json_codec_requires_pyjwt_2(self):
+        with self.assertRaisesRegex(TokenBackendError, "PyJWT 2 or newer"):
+            TokenBackend("HS256", SECRET, json_codec=CountingJSONCodec)
+
+    def test_orjson_codec_not_installed(self):
+        with patch.object(codecs, "orjson", None):
+            with self.assertRaisesRegex(TokenBackendError, "must have orjson"):
+                TokenBackend("HS256", SECRET, json_codec=OrjsonCodec)
+
+    def test_decode_hmac_fast_path(self):
+        self.payload["exp"] = datetime_to_epoch(aware_utcnow() + timedelta(days=1))
+        token = self.hmac_token_backend.encode(self.payload)
+
+        with patch.object(self.hmac_token_backend._jwt, "decode") as decode:
+            self.assertEqual(self.hmac_token_backend.decode(token), self.payload)
+
+        decode.assert_not_called()
+
+    def test_decode_hmac_fast_path_falls_back_to_pyjwt(self):
+        exp = datetime_to_epoch(aware_utcnow() + timedelta(days=1))
+        tokens = (
+            # Header not in the form the backend encodes it
+            jwt.encode(self.payload, SECRET, algorithm="HS256", headers={"kid": "1"}),
+            # Timestamp which isn't an integer
+            jwt.encode({"exp": exp + 0.5}, SECRET, algorithm="HS256"),
+        )
+
+        for token in tokens:
+            with patch.object(
+                self.hmac_token_backend._jwt,
+                "decode",
+                wraps=self.hmac_token_backend._jwt.decode,
+            ) as decode:
+                self.hmac_token_backend.decode(token)
+
+            decode.assert_called_once()
+
+        # PyJWT 1.7.1 doesn't check the type of "sub"
+        if not IS_OLD_JWT:
+            self.payload["sub"] = 1
+            token = jwt.encode(self.payload, SECRET, algorithm="HS256")
+            with self.assertRaisesRegex(TokenBackendError, "Token is invalid"):
+                self.hmac_token_backend.decode(token)
+
+    def test_decode_hmac_fast_path_disabled(self):
+        backend = TokenBackend("HS256", SECRET, fast_hmac=False)
+        self.assertIsNone(backend.hmac_verifier)
+        self.assertIsNone(self.aud_iss_token_backend.hmac_verifier)
+
+        token = backend.encode(self.payload)
+        self.assertEqual(backend.decode(token), self.payload)
+
+
+class TestTokenBackendKeyring(TestCase):
+    def setUp(self):
+        self.payload = {"foo": "bar"}
+        self.old_key = {
+            "kid": "old",
+            "algorithm": "RS256",
+            "signing_key": PRIVATE_KEY,
+            "verifying_key": PUBLIC_KEY,
+        }
+        self.new_key = {
+            "kid": "new",
+            "algorithm": "RS256",
+            "signing_key": PRIVATE_KEY_2,
+            "verifying_key": PUBLIC_KEY_2,
+            "active": True,
+        }
+        self.backend = TokenBackend("HS256", keyring=[self.old_key, self.new_key])
+
+    def test_encode_uses_active_key(self):
+        token = self.backend.encode(self.payload)
+
+        self.assertEqual(jwt.get_unverified_header(token)["kid"], "new")
+        self.assertEqual(
+            jwt.decode(token, PUBLIC_KEY_2, algorithms=["RS256"]), self.payload
+        )
+        self.assertEqual(self.backend.algorithm, "RS256")
+
+    def test_decode_dispatches_by_kid(self):
+        old_token = jwt.encode(
+            self.payload, PRIVATE_KEY, algorithm="RS256", headers={"kid": "old"}
+        )
+        self.assertEqual(self.backend.decode(old_token), self.payload)
+        self.assertEqual(
+            self.backend.decode(self.backend.encode(self.payload)), self.payload
+        )
+
+        # Only the key matching the kid is tried
+        wrong_kid_token = jwt.encode(
+            self.payload, PRIVATE_KEY, algorithm="RS256", headers={"kid": "new"}
+        )
+        with self.assertRaisesRegex(TokenBackendError, "Token is invalid"):
+            self.backend.decode(wrong_kid_token)
+
+        with patch("rest_framework_simplejwt.backends.prepare_key") as prepare_key:
+            self.backend.decode(old_token)
+            prepare_key.assert_not_called()
+
+    def test_decode_unknown_or_missing_kid(self):
+        for headers in ({"kid": "unknown"}, None):
+            token = jwt.encode(
+                self.payload, PRIVATE_KEY, algorithm="RS256", headers=headers
+            )
+            with self.assertRaisesRegex(TokenBackendError, "Token is invalid"):
+                self.backend.decode(token)
+
+    def test_key_without_kid_verifies_tokens_without_kid(self):
+        backend = TokenBackend(
+            "HS256",
+            keyring=[
+                {"kid": None, "algorithm": "HS256", "signing_key": SECRET},
+                self.new_key,
+            ],
+        )
+
+        token = jwt.encode(self.payload, SECRET, algorithm="HS256")
+        self.assertEqual(backend.decode(token), self.payload)
+
+    def test_invalid_keyring(self):
+        with self.assertRaisesRegex(TokenBackendError, "exactly one active key"):
+            TokenBackend("HS256", keyring=[self.old_key])
+
+        with self.assertRaisesRegex(TokenBackendError, "exactly one active key"):
+            TokenBackend(
+                "HS256", keyring=[self.new_key, {**self.old_key, "active": True}]
+            )
+
+        with self.assertRaisesRegex(TokenBackendError, "Duplicate key id"):
+            TokenBackend(
+                "HS256", keyring=[self.new_key, {**self.old_key, "kid": "new"}]
+            )
+
+        with self.assertRaisesRegex(TokenBackendError, "Unrecognized algorithm"):
+            TokenBackend("HS256", keyring=[{**self.new_key, "algorithm": "XX256"}])
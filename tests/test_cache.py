@@ -0,0 +1,89 @@
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from rest_framework_simplejwt.cache import LRUCache, UserCache
+
+
+class TestLRUCache(TestCase):
+    def setUp(self):
+        self.cache = LRUCache(2)
+        self.expires_at = time.time() + 60
+
+    def test_maxsize_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            LRUCache(0)
+
+    def test_get_and_set(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("a", "default"), "default")
+
+        self.cache.set("a", 1, self.expires_at)
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertIn("a", self.cache)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set("a", 1, self.expires_at)
+        self.cache.set("b", 2, self.expires_at)
+
+        # Touch "a" so that "b" becomes the least recently used entry
+        self.cache.get("a")
+        self.cache.set("c", 3, self.expires_at)
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("c"), 3)
+
+    def test_expired_entries_are_missing(self):
+        # Already expired entries are never stored
+        self.cache.set("a", 1, time.time() - 1)
+        self.assertEqual(len(self.cache), 0)
+
+        self.cache.set("b", 2, self.expires_at)
+        with patch("rest_framework_simplejwt.cache.time.time") as fake_time:
+            fake_time.return_value = self.expires_at
+            self.assertIsNone(self.cache.get("b"))
+
+        self.assertEqual(len(self.cache), 0)
+
+    def test_delete_and_clear(self):
+        self.cache.set("a", 1, self.expires_at)
+        self.cache.set("b", 2, self.expires_at)
+
+        self.cache.delete("a")
+        self.cache.delete("missing")
+        self.assertIsNone(self.cache.get("a"))
+
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestUserCache(TestCase):
+    def test_local_cache_returns_copies(self):
+        cache = UserCache(timedelta(minutes=5))
+        user = {"id": 42}
+
+        with patch("rest_framework_simplejwt.cache.copy", side_effect=dict) as copy:
+            cache.set(42, user)
+            cached_user = cache.get("42")
+
+        self.assertEqual(copy.call_count, 2)
+        self.assertEqual(cached_user, user)
+        self.assertIsNot(cached_user, user)
+
+        cache.delete(42)
+        self.assertIsNone(cache.get(42))
+
+    def test_django_cache(self):
+        cache = UserCache(timedelta(minutes=5), alias="default")
+        self.addCleanup(cache.cache.clear)
+
+        cache.set(42, "user")
+        self.assertEqual(cache.cache.get("rest_framework_simplejwt.user:42"), "user")
+        self.assertEqual(cache.get("42"), "user")
+
+        cache.delete(42)
+        self.assertIsNone(cache.get(42))
@@ -0,0 +1,157 @@
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+import pytest
+from django.test import TestCase
+from jwt.algorithms import RSAAlgorithm
+
+from rest_framework_simplejwt.backends import JWK_CLIENT_AVAILABLE, TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from tests.keys import PRIVATE_KEY, PRIVATE_KEY_2, PUBLIC_KEY, PUBLIC_KEY_2
+
+if JWK_CLIENT_AVAILABLE:
+    from jwt import PyJWKClientError
+
+    from rest_framework_simplejwt.jwks import JWKSKeyManager
+
+
+def make_jwk(public_key, kid):
+    jwk = json.loads(
+        RSAAlgorithm.to_jwk(RSAAlgorithm(RSAAlgorithm.SHA256).prepare_key(public_key))
+    )
+    jwk.update(kid=kid, use="sig", alg="RS256")
+    return jwk
+
+
+class JWKSServer(ThreadingHTTPServer):
+    """
+    A local stand-in for a JWKS endpoint which counts the requests it serves.
+    """
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.requests = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                body = json.dumps({"keys": server.keys}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(("127.0.0.1", 0), Handler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/jwks.json"
+
+
+@pytest.mark.skipif(
+    not JWK_CLIENT_AVAILABLE,
+    reason="PyJWT 1.7.1 doesn't have JWK client",
+)
+class TestJWKSKeyManager(TestCase):
+    def setUp(self):
+        self.server = JWKSServer([make_jwk(PUBLIC_KEY, "key-1")])
+        threading.Thread(
+            target=self.server.serve_forever, args=(0.01,), daemon=True
+        ).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.manager = JWKSKeyManager(self.server.url, timedelta(hours=1))
+        self.addCleanup(self.manager.stop)
+
+    def make_token(self, private_key=PRIVATE_KEY, kid="key-1"):
+        return jwt.encode(
+            {"foo": "bar"}, private_key, algorithm="RS256", headers={"kid": kid}
+        )
+
+    def test_keys_are_fetched_once(self):
+        token = self.make_token()
+
+        for _ in range(5):
+            self.manager.get_signing_key_from_jwt(token)
+
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(self.manager.get_signing_key("key-1").key_id, "key-1")
+
+    def test_start_prefetches_keys(self):
+        self.manager.start()
+        self.assertEqual(self.server.requests, 1)
+
+        self.manager.get_signing_key("key-1")
+        self.assertEqual(self.server.requests, 1)
+
+    def test_unknown_kid_refreshes_keys(self):
+        self.manager.miss_refresh_interval = 0
+        self.manager.start()
+
+        # The key is rotated after the keys were fetched
+        self.server.keys = [make_jwk(PUBLIC_KEY_2, "key-2")]
+
+        key = self.manager.get_signing_key_from_jwt(
+            self.make_token(PRIVATE_KEY_2, "key-2")
+        )
+        self.assertEqual(key.key_id, "key-2")
+        self.assertEqual(self.server.requests, 2)
+
+    def test_unknown_kid_refreshes_at_most_once_per_interval(self):
+        self.manager.start()
+
+        for _ in range(5):
+            with self.assertRaises(PyJWKClientError):
+                self.manager.get_signing_key("unknown")
+
+        self.assertEqual(self.server.requests, 1)
+
+    def test_concurrent_misses_are_fetched_once(self):
+        errors = []
+
+        def get_unknown_key():
+            try:
+                self.manager.get_signing_key("unknown")
+            except PyJWKClientError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=get_unknown_key) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(errors), 10)
+        # Threads waiting on the first fetch don't fetch the keys again
+        self.assertEqual(self.server.requests, 1)
+
+    def test_keys_are_refreshed_in_background(self):
+        manager = JWKSKeyManager(self.server.url, timedelta(milliseconds=10))
+        self.addCleanup(manager.stop)
+        manager.start()
+
+        deadline = time.monotonic() + 5
+        while self.server.requests < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertGreaterEqual(self.server.requests, 3)
+
+    def test_token_backend_decode(self):
+        backend = TokenBackend("RS256", PRIVATE_KEY, jwk_url=self.server.url)
+        self.addCleanup(backend.jwks_client.stop)
+
+        self.assertEqual(backend.decode(self.make_token()), {"foo": "bar"})
+
+        with self.assertRaisesRegex(TokenBackendError, "Token is invalid"):
+            backend.decode(self.make_token(kid="unknown"))
@@ -6,6 +6,8 @@ from django.test import TestCase
 from rest_framework_simplejwt.models import TokenUser
 from rest_framework_simplejwt.settings import api_settings
 
+from .utils import override_api_settings
+
 AuthToken = api_settings.AUTH_TOKEN_CLASSES[0]
 
 
@@ -118,6 +120,45 @@ class TestTokenUser(TestCase):
     def test_has_module_perms(self):
         self.assertFalse(self.user.has_module_perms("test_module"))
 
+    def test_permissions_from_claims(self):
+        self.token["permissions"] = ["test_app.view_thing", "test_app.change_thing"]
+        self.token["groups"] = ["editors"]
+
+        # Claims are ignored unless configured
+        self.assertFalse(TokenUser(self.token).has_perm("test_app.view_thing"))
+
+        with override_api_settings(
+            USER_PERMISSIONS_CLAIM="permissions", USER_GROUPS_CLAIM="groups"
+        ):
+            user = TokenUser(self.token)
+
+            self.assertEqual(
+                user.get_all_permissions(),
+                {"test_app.view_thing", "test_app.change_thing"},
+            )
+            self.assertEqual(user.get_all_permissions(obj=object()), set())
+            self.assertTrue(user.has_perm("test_app.view_thing"))
+            self.assertFalse(user.has_perm("test_app.view_thing", obj=object()))
+            self.assertFalse(user.has_perm("test_app.delete_thing"))
+            self.assertTrue(
+                user.has_perms(["test_app.view_thing", "test_app.change_thing"])
+            )
+            self.assertFalse(
+                user.has_perms(["test_app.view_thing", "test_app.delete_thing"])
+            )
+            self.assertTrue(user.has_module_perms("test_app"))
+            self.assertFalse(user.has_module_perms("test"))
+            self.assertEqual(user.group_names, frozenset({"editors"}))
+
+    def test_superuser_has_all_permissions(self):
+        self.token["is_superuser"] = True
+
+        with override_api_settings(USER_PERMISSIONS_CLAIM="permissions"):
+            user = TokenUser(self.token)
+
+            self.assertTrue(user.has_perm("test_app.view_thing"))
+            self.assertTrue(user.has_module_perms("test_app"))
+
     def test_is_anonymous(self):
         self.assertFalse(self.user.is_anonymous)
 
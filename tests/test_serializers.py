@@ -4,10 +4,13 @@ from unittest.mock import MagicMock, patch
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db.models import QuerySet
 from django.test import TestCase, override_settings
 from rest_framework import exceptions as drf_exceptions
 
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.models import TokenUser
 from rest_framework_simplejwt.serializers import (
     TokenBlacklistSerializer,
     TokenObtainPairSerializer,
@@ -185,6 +188,63 @@ class TestTokenObtainPairSerializer(TestCase):
         AccessToken(s.validated_data["access"])
         RefreshToken(s.validated_data["refresh"])
 
+    def test_it_should_embed_permissions_and_groups(self):
+        permission = Permission.objects.get(codename="view_user")
+        self.user.user_permissions.add(permission)
+        self.user.groups.add(Group.objects.create(name="editors"))
+        token_backend = RefreshToken().token_backend
+
+        with (
+            override_api_settings(
+                USER_PERMISSIONS_CLAIM="permissions", USER_GROUPS_CLAIM="groups"
+            ),
+            patch.object(token_backend, "encode", wraps=token_backend.encode) as encode,
+        ):
+            s = TokenObtainPairSerializer(
+                context=MagicMock(),
+                data={
+                    TokenObtainPairSerializer.username_field: self.username,
+                    "password": self.password,
+                },
+            )
+            self.assertTrue(s.is_valid())
+
+        # The claims are added before the refresh token is signed and stored
+        self.assertEqual(encode.call_count, 2)
+        refresh = RefreshToken(s.validated_data["refresh"])
+        self.assertEqual(
+            OutstandingToken.objects.get(jti=refresh["jti"]).token,
+            s.validated_data["refresh"],
+        )
+
+        access = AccessToken(s.validated_data["access"])
+        self.assertEqual(access["permissions"], ["auth.view_user"])
+        self.assertEqual(access["groups"], ["editors"])
+        self.assertNotIn("is_superuser", access)
+
+    def test_it_should_not_list_permissions_of_superusers(self):
+        self.user.is_superuser = True
+        self.user.save()
+
+        with override_api_settings(USER_PERMISSIONS_CLAIM="permissions"):
+            s = TokenObtainPairSerializer(
+                context=MagicMock(),
+                data={
+                    TokenObtainPairSerializer.username_field: self.username,
+                    "password": self.password,
+                },
+            )
+            self.assertTrue(s.is_valid())
+
+            access = AccessToken(s.validated_data["access"])
+            self.assertTrue(access["is_superuser"])
+            self.assertNotIn("permissions", access)
+
+            user = TokenUser(access)
+            self.assertTrue(user.is_superuser)
+            self.assertTrue(user.has_perm("auth.delete_user"))
+            self.assertTrue(user.has_module_perms("auth"))
+
 
 class TestTokenRefreshSlidingSerializer(TestCase):
     def setUp(self):
@@ -368,6 +428,16 @@ class TestTokenRefreshSerializer(TestCase):
 
         self.assertEqual(e.exception.get_codes(), "no_active_account")
 
+    def test_it_should_look_up_users_in_user_queryset(self):
+        refresh = RefreshToken.for_user(self.user)
+        s = TokenRefreshSerializer(data={"refresh": str(refresh)})
+
+        with override_api_settings(USER_QUERYSET=User.objects.none):
+            with self.assertRaises(drf_exceptions.AuthenticationFailed) as e:
+                s.is_valid()
+
+        self.assertEqual(e.exception.get_codes(), "no_active_account")
+
     def test_it_should_raise_error_for_inactive_users(self):
         refresh = RefreshToken.for_user(self.user)
         self.user.is_active = False
@@ -534,6 +604,71 @@ class TestTokenRefreshSerializer(TestCase):
         # Assert old refresh token is blacklisted
         self.assertEqual(BlacklistedToken.objects.first().token.jti, old_jti)
 
+    @override_api_settings(
+        ROTATE_REFRESH_TOKENS=True,
+        BLACKLIST_AFTER_ROTATION=True,
+    )
+    def test_it_should_rotate_refresh_token_blacklisted_concurrently(self):
+        refresh = RefreshToken.for_user(self.user)
+        ser = TokenRefreshSerializer(data={"refresh": str(refresh)})
+
+        # Another request refreshing the same token blacklists it between the
+        # check for blacklisted tokens and the insert
+        filter = QuerySet.filter
+
+        def blacklist_concurrently(queryset, *args, **kwargs):
+            if kwargs.pop("blacklistedtoken__isnull", None):
+                refresh.blacklist()
+            return filter(queryset, *args, **kwargs)
+
+        with patch.object(QuerySet, "filter", blacklist_concurrently):
+            self.assertTrue(ser.is_valid())
+
+        self.assertEqual(BlacklistedToken.objects.filter(jti=refresh["jti"]).count(), 1)
+        RefreshToken(ser.validated_data["refresh"])
+
+    @override_api_settings(
+        ROTATE_REFRESH_TOKENS=True,
+        BLACKLIST_AFTER_ROTATION=True,
+        CHECK_REVOKE_TOKEN=True,
+        REVOKE_TOKEN_CLAIM="hash_password",
+    )
+    def test_it_should_fetch_user_once_if_tokens_should_be_rotated_and_blacklisted(
+        self,
+    ):
+        refresh = RefreshToken.for_user(self.user)
+        old_jti = refresh["jti"]
+        OutstandingToken.objects.all().delete()
+
+        ser = TokenRefreshSerializer(data={"refresh": str(refresh)})
+
+        # The blacklist check and the user, then both outstanding tokens and
+        # the blacklisted token in a transaction
+        with (
+            patch.object(
+                refresh.token_backend, "encode", wraps=refresh.token_backend.encode
+            ) as encode,
+            self.assertNumQueries(6),
+        ):
+            self.assertTrue(ser.is_valid())
+
+        # Once for the access token and once for the new refresh token
+        self.assertEqual(encode.call_count, 2)
+
+        new_jti = RefreshToken(ser.validated_data["refresh"])["jti"]
+        self.assertEqual(
+            set(
+                OutstandingToken.objects.filter(user=self.user).values_list(
+                    "jti", flat=True
+                )
+            ),
+            {old_jti, new_jti},
+        )
+        self.assertEqual(
+            list(BlacklistedToken.objects.values_list("token__jti", flat=True)),
+            [old_jti],
+        )
+
     @override_api_settings(
         ROTATE_REFRESH_TOKENS=True,
         BLACKLIST_AFTER_ROTATION=True,
@@ -1,24 +1,67 @@
+import threading
+import time
+from datetime import timedelta
 from importlib import reload
+from io import StringIO
 from unittest.mock import patch
+from uuid import uuid4
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
-from django.core.management import call_command
-from django.db.models import BigAutoField
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import BigAutoField, QuerySet
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
 
 from rest_framework_simplejwt.exceptions import TokenError
-from rest_framework_simplejwt.serializers import TokenVerifySerializer
+from rest_framework_simplejwt.serializers import (
+    TokenRefreshSerializer,
+    TokenVerifySerializer,
+)
 from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.backends import (
+    BaseRevocationBackend,
+    CacheRevocationBackend,
+    JtiRevocationBackend,
+    ModelRevocationBackend,
+    get_revocation_backend,
+)
+from rest_framework_simplejwt.token_blacklist.epochs import (
+    ais_token_revoked,
+    get_token_epoch,
+    is_token_revoked,
+    make_key,
+    revoke_user_tokens,
+)
+from rest_framework_simplejwt.token_blacklist.index import (
+    BlacklistIndex,
+    BloomFilter,
+    get_blacklist_index,
+)
 from rest_framework_simplejwt.token_blacklist.models import (
     BlacklistedToken,
     OutstandingToken,
+    RevokedToken,
+    TokenEpoch,
 )
 from rest_framework_simplejwt.tokens import AccessToken, RefreshToken, SlidingToken
-from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch
+from rest_framework_simplejwt.utils import (
+    aware_utcnow,
+    datetime_from_epoch,
+    datetime_to_epoch,
+)
 
 from .utils import MigrationTestCase, override_api_settings
 
+CACHE_BACKEND = (
+    "rest_framework_simplejwt.token_blacklist.backends.CacheRevocationBackend"
+)
+JTI_BACKEND = "rest_framework_simplejwt.token_blacklist.backends.JtiRevocationBackend"
+
 
 class TestTokenBlacklist(TestCase):
     def setUp(self):
@@ -70,6 +113,24 @@ class TestTokenBlacklist(TestCase):
             outstanding_token.expires_at, datetime_from_epoch(token["exp"])
         )
 
+    def test_tokens_for_users_are_added_to_outstanding_list(self):
+        other_user = User.objects.create(username="other_user")
+        users = [self.user, other_user]
+
+        with self.assertNumQueries(2):
+            tokens = RefreshToken.for_users(users, max_workers=2, batch_size=1)
+
+        qs = OutstandingToken.objects.order_by("id")
+        self.assertEqual(qs.count(), 2)
+        for user, token, outstanding_token in zip(users, tokens, qs):
+            self.assertEqual(outstanding_token.user, user)
+            self.assertEqual(outstanding_token.jti, token["jti"])
+            self.assertEqual(outstanding_token.token, str(token))
+            self.assertEqual(outstanding_token.created_at, token.current_time)
+            self.assertEqual(
+                outstanding_token.expires_at, datetime_from_epoch(token["exp"])
+            )
+
     def test_access_tokens_are_not_added_to_outstanding_list(self):
         AccessToken.for_user(self.user)
 
@@ -129,6 +190,57 @@ class TestTokenBlacklist(TestCase):
 
         self.assertEqual(OutstandingToken.objects.count(), 2)
 
+    def test_blacklist_does_not_fetch_user(self):
+        token = RefreshToken.for_user(self.user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            token.blacklist()
+
+        user_table = User._meta.db_table
+        self.assertFalse(
+            any(
+                q["sql"].startswith("SELECT") and user_table in q["sql"]
+                for q in ctx.captured_queries
+            )
+        )
+        self.assertEqual(OutstandingToken.objects.get().user, self.user)
+
+    def test_outstand(self):
+        token = RefreshToken()
+        token["user_id"] = self.user.id
+
+        outstanding_token, created = token.outstand()
+        self.assertTrue(created)
+        self.assertEqual(outstanding_token, OutstandingToken.objects.get())
+        self.assertEqual(outstanding_token.user_id, self.user.id)
+
+        # Should be a no-op if the token is already outstanding
+        self.assertEqual(token.outstand(), (outstanding_token, False))
+
+        outstanding_token = OutstandingToken.objects.get()
+        self.assertEqual(outstanding_token.jti, token["jti"])
+        self.assertEqual(outstanding_token.user, self.user)
+        self.assertEqual(outstanding_token.token, str(token))
+
+        # Tokens for unknown users are outstanding without a user
+        token = RefreshToken()
+        token["user_id"] = 4242
+        outstanding_token, _ = token.outstand()
+        self.assertIsNone(outstanding_token.user_id)
+        self.assertIsNone(OutstandingToken.objects.get(jti=token["jti"]).user)
+
+    @patch.object(connection.features, "supports_ignore_conflicts", False)
+    def test_outstand_without_ignore_conflicts_support(self):
+        token = RefreshToken()
+        token["user_id"] = self.user.id
+
+        token.outstand()
+        token.outstand()
+
+        outstanding_token = OutstandingToken.objects.get()
+        self.assertEqual(outstanding_token.jti, token["jti"])
+        self.assertEqual(outstanding_token.user, self.user)
+
     def test_outstanding_token_and_blacklisted_token_expected_str(self):
         outstanding = OutstandingToken.objects.create(
             user=self.user,
@@ -138,6 +250,8 @@ class TestTokenBlacklist(TestCase):
         )
         blacklisted = BlacklistedToken.objects.create(token=outstanding)
 
+        self.assertEqual(blacklisted.jti, outstanding.jti)
+
         expected_outstanding_str = "Token for {} ({})".format(
             outstanding.user, outstanding.jti
         )
@@ -246,6 +360,88 @@ class TestTokenBlacklistFlushExpiredTokens(TestCase):
             [not_expired_2["jti"], not_expired_3["jti"]],
         )
 
+    def make_expired_tokens(self, count):
+        fake_now = aware_utcnow() - api_settings.REFRESH_TOKEN_LIFETIME
+
+        with patch("rest_framework_simplejwt.tokens.aware_utcnow") as fake_aware_utcnow:
+            fake_aware_utcnow.return_value = fake_now
+            tokens = [RefreshToken.for_user(self.user) for _ in range(count)]
+
+        for token in tokens:
+            token.blacklist()
+
+        return tokens
+
+    def test_it_should_delete_in_batches(self):
+        self.make_expired_tokens(5)
+        not_expired = RefreshToken.for_user(self.user)
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as context:
+            call_command("flushexpiredtokens", "--batch-size", "2", stdout=out)
+
+        deletes = [q for q in context.captured_queries if q["sql"].startswith("DELETE")]
+        # Two deletes (blacklisted, outstanding) for each of the three batches
+        self.assertEqual(len(deletes), 6)
+        self.assertIn("Deleted 5 expired token(s)", out.getvalue())
+        self.assertEqual(
+            list(OutstandingToken.objects.values_list("jti", flat=True)),
+            [not_expired["jti"]],
+        )
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    def test_it_should_stop_after_max_runtime(self):
+        self.make_expired_tokens(3)
+
+        out = StringIO()
+        call_command(
+            "flushexpiredtokens",
+            "--batch-size",
+            "1",
+            "--max-runtime",
+            "0",
+            stdout=out,
+        )
+
+        self.assertIn("--max-runtime reached", out.getvalue())
+        self.assertIn("Deleted 1 expired token(s)", out.getvalue())
+        self.assertEqual(OutstandingToken.objects.count(), 2)
+
+    def test_it_should_sleep_between_batches(self):
+        self.make_expired_tokens(2)
+
+        with patch("time.sleep") as sleep:
+            call_command(
+                "flushexpiredtokens",
+                "--batch-size",
+                "1",
+                "--sleep",
+                "0.5",
+                stdout=StringIO(),
+            )
+
+        self.assertEqual(sleep.call_count, 2)
+        sleep.assert_called_with(0.5)
+        self.assertFalse(OutstandingToken.objects.exists())
+
+    def test_dry_run_should_not_delete(self):
+        self.make_expired_tokens(2)
+        RefreshToken.for_user(self.user)
+
+        out = StringIO()
+        call_command("flushexpiredtokens", "--dry-run", stdout=out)
+
+        self.assertIn(
+            "Would delete 2 expired outstanding token(s) and 2 blacklisted token(s)",
+            out.getvalue(),
+        )
+        self.assertEqual(OutstandingToken.objects.count(), 3)
+        self.assertEqual(BlacklistedToken.objects.count(), 2)
+
+    def test_invalid_batch_size(self):
+        with self.assertRaises(CommandError):
+            call_command("flushexpiredtokens", "--batch-size", "0")
+
     def test_token_blacklist_will_not_be_removed_on_User_delete(self):
         token = RefreshToken.for_user(self.user)
         outstanding_token = OutstandingToken.objects.first()
@@ -270,6 +466,597 @@ class TestTokenBlacklistFlushExpiredTokens(TestCase):
             self.assertIn("blacklisted", e.exception.args[0])
 
 
+class TestBulkBlacklist(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test_user",
+            password="test_password",
+        )
+        self.other_user = User.objects.create(username="other_user")
+
+        self.tokens = RefreshToken.for_users([self.user, self.user, self.other_user])
+        self.tokens[0].blacklist()
+
+    def assertBlacklisted(self, tokens):
+        self.assertEqual(
+            set(BlacklistedToken.objects.values_list("jti", flat=True)),
+            {token["jti"] for token in tokens},
+        )
+
+    def test_revoke_for_user(self):
+        with self.assertNumQueries(1):
+            count = BlacklistedToken.objects.revoke_for_user(self.user)
+
+        # Already blacklisted tokens should be skipped
+        self.assertEqual(count, 1)
+        self.assertBlacklisted(self.tokens[:2])
+
+        for token in self.tokens[:2]:
+            with self.assertRaises(TokenError):
+                RefreshToken(str(token))
+
+        blacklisted_token = BlacklistedToken.objects.get(jti=self.tokens[1]["jti"])
+        self.assertEqual(blacklisted_token.token.jti, self.tokens[1]["jti"])
+        self.assertIsNotNone(blacklisted_token.blacklisted_at)
+
+    def test_revoke_where(self):
+        count = BlacklistedToken.objects.revoke_where(
+            OutstandingToken.objects.filter(user=self.other_user)
+        )
+        self.assertEqual(count, 1)
+        self.assertBlacklisted([self.tokens[0], self.tokens[2]])
+
+        count = BlacklistedToken.objects.revoke_where(OutstandingToken.objects.all())
+        self.assertEqual(count, 1)
+        self.assertBlacklisted(self.tokens)
+
+    def test_revoke_where_skips_tokens_blacklisted_concurrently(self):
+        # Another request blacklists a token between the check for
+        # blacklisted tokens and the insert
+        filter = QuerySet.filter
+        concurrent = [self.tokens[1]]
+
+        def blacklist_concurrently(queryset, *args, **kwargs):
+            if kwargs.get("blacklistedtoken__isnull") and concurrent:
+                del kwargs["blacklistedtoken__isnull"]
+                concurrent.pop().blacklist()
+            return filter(queryset, *args, **kwargs)
+
+        for supports_ignore_conflicts in (True, False):
+            with (
+                self.subTest(supports_ignore_conflicts=supports_ignore_conflicts),
+                patch.object(
+                    connection.features,
+                    "supports_ignore_conflicts",
+                    supports_ignore_conflicts,
+                ),
+                patch.object(QuerySet, "filter", blacklist_concurrently),
+            ):
+                BlacklistedToken.objects.filter(jti=self.tokens[1]["jti"]).delete()
+                concurrent.append(self.tokens[1])
+
+                BlacklistedToken.objects.revoke_for_user(self.user)
+                self.assertBlacklisted(self.tokens[:2])
+
+    @override_api_settings(BLACKLIST_INDEX_REFRESH_INTERVAL=timedelta(minutes=1))
+    @patch("rest_framework_simplejwt.token_blacklist.index._blacklist_index", None)
+    def test_revoke_outstanding_updates_index(self):
+        get_blacklist_index().refresh(full=True)
+
+        get_revocation_backend().revoke_outstanding(
+            OutstandingToken.objects.filter(user=self.other_user)
+        )
+
+        with self.assertRaises(TokenError):
+            RefreshToken(str(self.tokens[2]))
+
+    def test_blacklisttokens_command(self):
+        out = StringIO()
+        call_command("blacklisttokens", "--user", str(self.other_user.id), stdout=out)
+
+        self.assertEqual(out.getvalue().strip(), "Blacklisted 1 token(s)")
+        self.assertBlacklisted([self.tokens[0], self.tokens[2]])
+
+        call_command(
+            "blacklisttokens",
+            "--created-after",
+            (aware_utcnow() - timedelta(minutes=1)).isoformat(),
+            stdout=out,
+        )
+        self.assertBlacklisted(self.tokens)
+
+    def test_blacklisttokens_command_requires_filters(self):
+        with self.assertRaises(CommandError):
+            call_command("blacklisttokens")
+
+        with self.assertRaises(CommandError):
+            call_command("blacklisttokens", "--created-before", "yesterday")
+
+    @override_api_settings(REVOCATION_BACKEND=CACHE_BACKEND)
+    def test_blacklisttokens_command_with_cache_backend(self):
+        self.addCleanup(cache.clear)
+
+        call_command("blacklisttokens", "--user", str(self.user.id), stdout=StringIO())
+
+        for token in self.tokens[:2]:
+            with self.assertRaises(TokenError):
+                RefreshToken(str(token))
+
+        RefreshToken(str(self.tokens[2]))
+
+
+class TestBlacklistIndex(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test_user",
+            password="test_password",
+        )
+
+    def test_bloom_filter(self):
+        bloom_filter = BloomFilter(100)
+        items = [uuid4().hex for _ in range(100)]
+
+        for item in items:
+            bloom_filter.add(item)
+
+        # No false negatives
+        for item in items:
+            self.assertIn(item, bloom_filter)
+
+        false_positives = sum(uuid4().hex in bloom_filter for _ in range(1000))
+        self.assertLess(false_positives, 20)
+
+    def test_index_is_loaded_and_refreshed_from_database(self):
+        blacklisted = RefreshToken.for_user(self.user)
+        blacklisted.blacklist()
+        not_blacklisted = RefreshToken.for_user(self.user)
+
+        index = BlacklistIndex(timedelta(minutes=1), capacity=10)
+
+        self.assertIn(blacklisted["jti"], index)
+        self.assertNotIn(not_blacklisted["jti"], index)
+
+        # Tokens blacklisted elsewhere are picked up on the next refresh
+        BlacklistedToken.objects.create(
+            token=OutstandingToken.objects.get(jti=not_blacklisted["jti"])
+        )
+        self.assertNotIn(not_blacklisted["jti"], index)
+
+        index.refresh()
+        self.assertIn(not_blacklisted["jti"], index)
+
+    def test_incremental_refresh_overlaps_by_a_margin(self):
+        index = BlacklistIndex(timedelta(minutes=10), capacity=10)
+        index.refresh()
+
+        recent, old = RefreshToken.for_user(self.user), RefreshToken.for_user(self.user)
+        for token, age in (
+            (recent, timedelta(seconds=10)),
+            (old, timedelta(minutes=5)),
+        ):
+            BlacklistedToken.objects.create(
+                token=OutstandingToken.objects.get(jti=token["jti"])
+            )
+            BlacklistedToken.objects.filter(jti=token["jti"]).update(
+                blacklisted_at=index._refreshed_at - age
+            )
+
+        # Rows committed shortly after the previous refresh started are picked
+        # up, without reading back a whole refresh interval
+        index.refresh()
+        self.assertIn(recent["jti"], index)
+        self.assertNotIn(old["jti"], index)
+
+    def test_stale_index_is_refreshed_once(self):
+        index = BlacklistIndex(timedelta(minutes=1), capacity=10)
+
+        def refresh(full=False):
+            index._next_refresh = time.monotonic() + 60
+
+        with patch.object(index, "_refresh", side_effect=refresh) as fake_refresh:
+            # Threads finding the index stale while it is being refreshed wait
+            # for the refresh instead of running their own
+            with index._lock:
+                threads = [
+                    threading.Thread(target=index.__contains__, args=("jti",))
+                    for _ in range(3)
+                ]
+                for thread in threads:
+                    thread.start()
+                time.sleep(0.1)
+
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(fake_refresh.call_count, 1)
+
+    def test_index_is_rebuilt_when_over_capacity(self):
+        index = BlacklistIndex(timedelta(minutes=1), capacity=1)
+        index.refresh()
+
+        for _ in range(3):
+            RefreshToken.for_user(self.user).blacklist()
+
+        index.refresh()
+        self.assertEqual(index.capacity, 6)
+
+    def test_get_blacklist_index_disabled_by_default(self):
+        self.assertIsNone(get_blacklist_index())
+
+    @override_api_settings(BLACKLIST_INDEX_REFRESH_INTERVAL=timedelta(minutes=1))
+    def test_check_blacklist_uses_index(self):
+        index = get_blacklist_index()
+        self.assertIsInstance(index, BlacklistIndex)
+        self.assertIs(get_blacklist_index(), index)
+
+        token = RefreshToken.for_user(self.user)
+        index.refresh(full=True)
+
+        # Tokens missing from the index should not query the blacklist
+        with self.assertNumQueries(0):
+            RefreshToken(str(token))
+
+        # Tokens blacklisted by this process are added to the index
+        token.blacklist()
+        with self.assertRaises(TokenError):
+            RefreshToken(str(token))
+
+
+class TestRevocationBackends(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test_user",
+            password="test_password",
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_get_revocation_backend(self):
+        backend = get_revocation_backend()
+        self.assertIsInstance(backend, ModelRevocationBackend)
+        self.assertIs(get_revocation_backend(), backend)
+
+        with override_api_settings(REVOCATION_BACKEND=CACHE_BACKEND):
+            self.assertIsInstance(get_revocation_backend(), CacheRevocationBackend)
+
+    def test_base_backend_is_abstract(self):
+        backend = BaseRevocationBackend()
+
+        with self.assertRaises(NotImplementedError):
+            backend.is_revoked("abc")
+
+        with self.assertRaises(NotImplementedError):
+            backend.revoke("abc", 0)
+
+    def test_model_backend_revoke(self):
+        backend = ModelRevocationBackend()
+        exp = datetime_to_epoch(aware_utcnow() + timedelta(days=1))
+
+        self.assertFalse(backend.is_revoked("abc"))
+
+        blacklisted_token, created = backend.revoke("abc", exp)
+        self.assertTrue(created)
+        self.assertEqual(blacklisted_token.jti, "abc")
+        self.assertEqual(blacklisted_token.token.expires_at, datetime_from_epoch(exp))
+        self.assertTrue(backend.is_revoked("abc"))
+
+        backend.revoke_many([("abc", exp), ("def", exp)])
+        self.assertEqual(
+            sorted(BlacklistedToken.objects.values_list("jti", flat=True)),
+            ["abc", "def"],
+        )
+
+    def test_cache_backend_revoke(self):
+        backend = CacheRevocationBackend()
+        exp = datetime_to_epoch(aware_utcnow() + timedelta(days=1))
+        expired = datetime_to_epoch(aware_utcnow() - timedelta(days=1))
+
+        backend.revoke("abc", exp)
+        backend.revoke("expired", expired)
+        self.assertTrue(backend.is_revoked("abc"))
+        self.assertFalse(backend.is_revoked("expired"))
+
+        backend.revoke_many([("def", exp), ("ghi", exp + 1), ("old", expired)])
+        self.assertTrue(backend.is_revoked("def"))
+        self.assertTrue(backend.is_revoked("ghi"))
+        self.assertFalse(backend.is_revoked("old"))
+
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    @override_api_settings(
+        LEEWAY=timedelta(seconds=30),
+        TOKEN_BACKENDS={"refresh": {"LEEWAY": 60.5}},
+    )
+    def test_cache_backend_revoke_with_leeway(self):
+        backend = CacheRevocationBackend()
+        self.assertEqual(backend.get_leeway(), 61)
+
+        # Expired, but still accepted within the leeway
+        exp = datetime_to_epoch(aware_utcnow() - timedelta(seconds=10))
+        with patch.object(backend.cache, "set_many") as set_many:
+            backend.revoke("abc", exp)
+
+        timeout = set_many.call_args.args[1]
+        self.assertGreater(timeout, 40)
+        self.assertLessEqual(timeout, 51)
+
+        backend.revoke("abc", exp)
+        self.assertTrue(backend.is_revoked("abc"))
+
+    async def test_ais_revoked(self):
+        exp = datetime_to_epoch(aware_utcnow() + timedelta(days=1))
+
+        for backend in (ModelRevocationBackend(), CacheRevocationBackend()):
+            self.assertFalse(await backend.ais_revoked("abc"))
+            await sync_to_async(backend.revoke)("abc", exp)
+            self.assertTrue(await backend.ais_revoked("abc"))
+
+    @patch("rest_framework_simplejwt.token_blacklist.index._blacklist_index", None)
+    async def test_model_backend_ais_revoked_with_index(self):
+        # The settings override is sync, so it can't decorate an async test
+        with override_api_settings(
+            BLACKLIST_INDEX_REFRESH_INTERVAL=timedelta(minutes=1)
+        ):
+            backend = ModelRevocationBackend()
+            await sync_to_async(backend.revoke)(
+                "abc", datetime_to_epoch(aware_utcnow() + timedelta(days=1))
+            )
+            # Loads the index
+            self.assertTrue(await backend.ais_revoked("abc"))
+
+            # assertNumQueries can't be used from an async test
+            with patch.object(
+                BlacklistedToken.objects, "filter", side_effect=AssertionError
+            ):
+                self.assertFalse(await backend.ais_revoked("def"))
+
+    async def test_ablacklist(self):
+        token = RefreshToken()
+        await token.ablacklist()
+
+        with self.assertRaises(TokenError):
+            await RefreshToken.afrom_token(str(token))
+
+    async def test_afrom_token_runs_overridden_verify(self):
+        class ScopedRefreshToken(RefreshToken):
+            def verify(self, *args, **kwargs):
+                super().verify(*args, **kwargs)
+                if self.get("scope") != "api":
+                    raise TokenError("Token has the wrong scope")
+
+        token = ScopedRefreshToken()
+        with self.assertRaises(TokenError):
+            await ScopedRefreshToken.afrom_token(str(token))
+
+        token["scope"] = "api"
+        await ScopedRefreshToken.afrom_token(str(token))
+
+        # The blacklist is still checked, without blocking the event loop
+        await token.ablacklist()
+        with self.assertRaises(TokenError):
+            await ScopedRefreshToken.afrom_token(str(token))
+
+    @override_api_settings(REVOCATION_BACKEND=CACHE_BACKEND)
+    def test_tokens_can_be_blacklisted_with_cache_backend(self):
+        token = RefreshToken.for_user(self.user)
+
+        # Should raise no exception
+        RefreshToken(str(token))
+
+        self.assertIsNone(token.blacklist())
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+        with self.assertRaises(TokenError):
+            RefreshToken(str(token))
+
+        serializer = TokenVerifySerializer(data={"token": str(token)})
+        self.assertFalse(serializer.is_valid())
+
+
+class TestJtiRevocationBackend(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test_user",
+            password="test_password",
+        )
+
+    def test_revoke(self):
+        backend = JtiRevocationBackend()
+        exp = datetime_to_epoch(aware_utcnow() + timedelta(days=1))
+
+        self.assertFalse(backend.is_revoked("abc"))
+
+        backend.revoke("abc", exp)
+        backend.revoke_many([("abc", exp), ("def", exp)])
+        self.assertTrue(backend.is_revoked("abc"))
+        self.assertEqual(
+            sorted(RevokedToken.objects.values_list("jti", flat=True)), ["abc", "def"]
+        )
+        self.assertEqual(
+            RevokedToken.objects.get(jti="abc").expires_at, datetime_from_epoch(exp)
+        )
+
+    def test_blacklisted_tokens_remain_revoked(self):
+        exp = datetime_to_epoch(aware_utcnow() + timedelta(days=1))
+        ModelRevocationBackend().revoke("abc", exp)
+        backend = JtiRevocationBackend()
+
+        with self.assertNumQueries(1):
+            self.assertTrue(backend.is_revoked("abc"))
+        self.assertFalse(backend.is_revoked("def"))
+        self.assertFalse(RevokedToken.objects.exists())
+
+    async def test_ais_revoked(self):
+        exp = datetime_to_epoch(aware_utcnow() + timedelta(days=1))
+        await sync_to_async(ModelRevocationBackend().revoke)("abc", exp)
+        backend = JtiRevocationBackend()
+        await sync_to_async(backend.revoke)("def", exp)
+
+        self.assertTrue(await backend.ais_revoked("abc"))
+        self.assertTrue(await backend.ais_revoked("def"))
+        self.assertFalse(await backend.ais_revoked("ghi"))
+
+    @override_api_settings(REVOCATION_BACKEND=JTI_BACKEND)
+    def test_tokens_are_not_outstanded(self):
+        token = RefreshToken.for_user(self.user)
+        SlidingToken.for_user(self.user)
+        RefreshToken.for_users([self.user, self.user])
+
+        self.assertFalse(OutstandingToken.objects.exists())
+
+        # Unless explicitly
+        outstanding_token, created = token.outstand()
+        self.assertTrue(created)
+        self.assertEqual(outstanding_token.jti, token["jti"])
+
+    @override_api_settings(REVOCATION_BACKEND=JTI_BACKEND)
+    def test_tokens_can_be_blacklisted(self):
+        token = RefreshToken.for_user(self.user)
+
+        # Should raise no exception
+        RefreshToken(str(token))
+
+        with self.assertNumQueries(1):
+            self.assertIsNone(token.blacklist())
+        self.assertFalse(OutstandingToken.objects.exists())
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+        with self.assertRaises(TokenError):
+            RefreshToken(str(token))
+
+    @override_api_settings(
+        REVOCATION_BACKEND=JTI_BACKEND,
+        ROTATE_REFRESH_TOKENS=True,
+        BLACKLIST_AFTER_ROTATION=True,
+    )
+    def test_rotation(self):
+        token = RefreshToken.for_user(self.user)
+
+        serializer = TokenRefreshSerializer(data={"refresh": str(token)})
+        self.assertTrue(serializer.is_valid())
+
+        self.assertFalse(OutstandingToken.objects.exists())
+        self.assertEqual(
+            list(RevokedToken.objects.values_list("jti", flat=True)),
+            [token[api_settings.JTI_CLAIM]],
+        )
+
+    def test_flushexpiredtokens(self):
+        backend = JtiRevocationBackend()
+        backend.revoke("expired", datetime_to_epoch(aware_utcnow() - timedelta(days=1)))
+        backend.revoke("abc", datetime_to_epoch(aware_utcnow() + timedelta(days=1)))
+
+        call_command("flushexpiredtokens", stdout=StringIO())
+
+        self.assertEqual(
+            list(RevokedToken.objects.values_list("jti", flat=True)), ["abc"]
+        )
+
+
+class TestTokenEpochs(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test_user",
+            password="test_password",
+        )
+        self.other_user = User.objects.create(
+            username="other_user",
+            password="test_password",
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    @override_api_settings(CHECK_TOKEN_EPOCH=True)
+    def test_revoke_user_tokens(self):
+        token = AccessToken.for_user(self.user)
+        other_token = AccessToken.for_user(self.other_user)
+        self.assertEqual(token[api_settings.TOKEN_EPOCH_CLAIM], 0)
+        self.assertFalse(is_token_revoked(token))
+
+        revoke_user_tokens(self.user)
+        self.assertTrue(is_token_revoked(token))
+        self.assertFalse(is_token_revoked(other_token))
+
+        # Only one row is stored per user
+        revoke_user_tokens(self.user)
+        self.assertEqual(
+            list(TokenEpoch.objects.values_list("user", "epoch")), [(self.user.id, 2)]
+        )
+
+    @override_api_settings(CHECK_TOKEN_EPOCH=True)
+    def test_tokens_issued_right_after_revoking_are_valid(self):
+        revoke_user_tokens(self.user)
+        token = RefreshToken.for_user(self.user)
+
+        self.assertEqual(token[api_settings.TOKEN_EPOCH_CLAIM], 1)
+        self.assertFalse(is_token_revoked(token))
+        self.assertFalse(is_token_revoked(token.access_token))
+
+        serializer = TokenRefreshSerializer(data={"refresh": str(token)})
+        self.assertTrue(serializer.is_valid())
+
+    @override_api_settings(CHECK_TOKEN_EPOCH=True)
+    def test_tokens_are_issued_with_epoch_from_database(self):
+        revoke_user_tokens(self.user)
+
+        # A cache local to this process which missed the revocation
+        cache.set(make_key(self.user.id), 0)
+
+        token = AccessToken.for_user(self.user)
+        self.assertEqual(token[api_settings.TOKEN_EPOCH_CLAIM], 1)
+
+        # Processes which have seen the revocation accept it
+        cache.clear()
+        self.assertFalse(is_token_revoked(token))
+
+    def test_tokens_without_epoch_claim_are_revoked(self):
+        token = AccessToken.for_user(self.user)
+        self.assertNotIn(api_settings.TOKEN_EPOCH_CLAIM, token)
+        self.assertFalse(is_token_revoked(token))
+
+        revoke_user_tokens(self.user)
+        self.assertTrue(is_token_revoked(token))
+
+    def test_tokens_without_user_id_are_not_revoked(self):
+        revoke_user_tokens(self.user)
+
+        self.assertFalse(is_token_revoked(AccessToken()))
+
+    def test_get_token_epoch_is_cached(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_token_epoch(self.user.id), 0)
+            self.assertEqual(get_token_epoch(self.user.id), 0)
+
+        revoke_user_tokens(self.user)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_token_epoch(self.user.id), 1)
+
+    async def test_ais_token_revoked(self):
+        token = await sync_to_async(AccessToken.for_user)(self.user)
+        self.assertFalse(await ais_token_revoked(token))
+
+        await sync_to_async(revoke_user_tokens)(self.user)
+        cache.clear()
+
+        self.assertTrue(await ais_token_revoked(token))
+
+    @override_api_settings(CHECK_TOKEN_EPOCH=True)
+    def test_revoked_tokens_are_rejected_by_serializers(self):
+        refresh = RefreshToken.for_user(self.user)
+        revoke_user_tokens(self.user)
+
+        serializer = TokenRefreshSerializer(data={"refresh": str(refresh)})
+        with self.assertRaises(AuthenticationFailed) as e:
+            serializer.is_valid()
+        self.assertEqual(e.exception.get_codes(), "token_revoked")
+
+        serializer = TokenVerifySerializer(data={"token": str(refresh)})
+        self.assertFalse(serializer.is_valid())
+
+
 class TestPopulateJtiHexMigration(MigrationTestCase):
     migrate_from = ("token_blacklist", "0002_outstandingtoken_jti_hex")
     migrate_to = ("token_blacklist", "0003_auto_20171017_2007")
@@ -301,7 +1088,7 @@ class TestPopulateJtiHexMigration(MigrationTestCase):
 
 class TokenVerifySerializerShouldHonourBlacklist(MigrationTestCase):
     migrate_from = ("token_blacklist", "0002_outstandingtoken_jti_hex")
-    migrate_to = ("token_blacklist", "0003_auto_20171017_2007")
+    migrate_to = ("token_blacklist", "0014_blacklistedtoken_jti")
 
     def setUp(self):
         self.user = User.objects.create(
@@ -332,6 +1119,29 @@ class TokenVerifySerializerShouldHonourBlacklist(MigrationTestCase):
         self.assertTrue(serializer.is_valid())
 
 
+class TestPopulateBlacklistedTokenJtiMigration(MigrationTestCase):
+    migrate_from = ("token_blacklist", "0013_alter_blacklistedtoken_options_and_more")
+    migrate_to = ("token_blacklist", "0014_blacklistedtoken_jti")
+
+    def setUpBeforeMigration(self, apps):
+        OutstandingToken = apps.get_model("token_blacklist", "OutstandingToken")
+        BlacklistedToken = apps.get_model("token_blacklist", "BlacklistedToken")
+
+        for jti in ("abc", "def"):
+            outstanding = OutstandingToken.objects.create(
+                jti=jti, token="xyz", expires_at=timezone.now()
+            )
+            BlacklistedToken.objects.create(token=outstanding)
+
+    def test_jti_field_should_be_copied_from_outstanding_token(self):
+        BlacklistedToken = self.apps.get_model("token_blacklist", "BlacklistedToken")
+
+        self.assertEqual(
+            [(i.jti, i.token.jti) for i in BlacklistedToken.objects.order_by("id")],
+            [("abc", "abc"), ("def", "def")],
+        )
+
+
 class TestBigAutoFieldIDMigration(MigrationTestCase):
     migrate_from = ("token_blacklist", "0007_auto_20171017_2214")
     migrate_to = ("token_blacklist", "0008_migrate_to_bigautofield")
@@ -7,6 +7,7 @@ from django.test import TestCase
 from freezegun import freeze_time
 from jose import jwt
 
+from rest_framework_simplejwt import state, tokens
 from rest_framework_simplejwt.exceptions import (
     ExpiredTokenError,
     TokenBackendError,
@@ -213,6 +214,93 @@ class TestToken(TestCase):
             ),
         )
 
+    def test_str_is_memoized(self):
+        with patch.object(
+            token_backend, "encode", wraps=token_backend.encode
+        ) as encode:
+            encoded_token = str(self.token)
+            self.assertEqual(str(self.token), encoded_token)
+            self.assertEqual(encode.call_count, 1)
+
+            # Any change to the payload should cause the token to be signed
+            # again
+            changes = (
+                lambda: self.token.__setitem__("test", 1234),
+                lambda: self.token.__delitem__("test"),
+                lambda: self.token.set_jti(),
+                lambda: self.token.set_exp(lifetime=timedelta(days=2)),
+                lambda: self.token.set_iat(at_time=aware_utcnow() - timedelta(days=1)),
+                lambda: self.token.payload.update(test=2345),
+                lambda: self.token.__setitem__("nested", {"roles": ["a"]}),
+                lambda: self.token["nested"]["roles"].append("b"),
+                lambda: self.token["nested"].update(scope="read"),
+            )
+            for i, change in enumerate(changes, start=2):
+                change()
+                new_encoded_token = str(self.token)
+                self.assertNotEqual(new_encoded_token, encoded_token)
+                self.assertEqual(encode.call_count, i)
+                self.assertEqual(
+                    token_backend.decode(new_encoded_token), self.token.payload
+                )
+                encoded_token = new_encoded_token
+
+    def test_str_reuses_given_token(self):
+        encoded_token = str(self.token)
+
+        with patch.object(token_backend, "encode") as encode:
+            self.assertEqual(str(MyToken(encoded_token)), encoded_token)
+            self.assertEqual(str(MyToken(encoded_token.encode())), encoded_token)
+            encode.assert_not_called()
+
+        # Unverified tokens should be signed again
+        unverified = MyToken(encoded_token, verify=False)
+        with patch.object(token_backend, "encode") as encode:
+            encode.return_value = "re-encoded"
+            self.assertEqual(str(unverified), "re-encoded")
+
+    def test_from_token(self):
+        encoded_token = str(self.token)
+
+        token = MyToken.from_token(encoded_token, {})
+        self.assertEqual(token.payload, self.token.payload)
+        self.assertEqual(str(token), encoded_token)
+
+        with self.assertRaises(TokenError):
+            MyToken.from_token(str(AccessToken()), {})
+
+    def test_from_token_with_overridden_init(self):
+        class InitToken(MyToken):
+            def __init__(self, *args, **kwargs):
+                self.initialized = True
+                super().__init__(*args, **kwargs)
+
+        encoded_token = str(self.token)
+
+        for decoded in (None, {}):
+            token = InitToken.from_token(encoded_token, decoded)
+            self.assertTrue(token.initialized)
+            self.assertEqual(token.payload, self.token.payload)
+
+        # Tokens of another type are rejected with the shared payloads, before
+        # the token is built
+        with (
+            patch.object(InitToken, "__init__") as init,
+            self.assertRaises(TokenError),
+        ):
+            InitToken.from_token(str(AccessToken()), {})
+        init.assert_not_called()
+
+    async def test_afrom_token_with_overridden_init(self):
+        class InitToken(MyToken):
+            def __init__(self, *args, **kwargs):
+                self.initialized = True
+                super().__init__(*args, **kwargs)
+
+        token = await InitToken.afrom_token(str(self.token), {})
+        self.assertTrue(token.initialized)
+        self.assertEqual(token.payload, self.token.payload)
+
     def test_repr(self):
         self.assertEqual(repr(self.token), repr(self.token.payload))
 
@@ -296,6 +384,17 @@ class TestToken(TestCase):
             token["refresh_iat"], datetime_to_epoch(now + timedelta(days=1))
         )
 
+    def test_verify_required_claims(self):
+        class ClaimToken(MyToken):
+            required_claims = ("scope",)
+
+        token = ClaimToken()
+        with self.assertRaisesRegex(TokenError, "Token has no 'scope' claim"):
+            token.verify()
+
+        token["scope"] = "read"
+        token.verify()
+
     def test_check_exp(self):
         token = MyToken()
 
@@ -369,6 +468,20 @@ class TestToken(TestCase):
 
         token.token_backend.leeway = 0
 
+    def test_check_exp_uses_overridden_get_token_backend(self):
+        lenient_backend = state.make_token_backend(LEEWAY=timedelta(days=2))
+
+        class LenientToken(MyToken):
+            def get_token_backend(self):
+                return lenient_backend
+
+        token = LenientToken()
+        token.set_exp("refresh_exp", lifetime=timedelta(days=1))
+
+        token.check_exp(
+            "refresh_exp", current_time=token.current_time + timedelta(days=2)
+        )
+
     def test_check_token_if_wrong_type_leeway(self):
         token = MyToken()
         token.set_exp("refresh_exp", lifetime=timedelta(days=1))
@@ -388,6 +501,21 @@ class TestToken(TestCase):
 
         self.assertEqual(token[api_settings.USER_ID_CLAIM], user_id)
 
+    def test_for_users(self):
+        other_user = User.objects.create_user(username="other_user")
+        users = [self.user, other_user]
+
+        for max_workers in (None, 2):
+            tokens = MyToken.for_users(iter(users), max_workers=max_workers)
+
+            self.assertEqual(len(tokens), 2)
+            for user, token in zip(users, tokens):
+                self.assertIsInstance(token, MyToken)
+                self.assertEqual(token[api_settings.USER_ID_CLAIM], str(user.id))
+                # Tokens should already be signed
+                self.assertIsNotNone(token._encoded)
+                self.assertEqual(token_backend.decode(str(token)), token.payload)
+
     @override_api_settings(USER_ID_FIELD="username")
     def test_for_user_with_username(self):
         # Test with non-int user id
@@ -404,6 +532,33 @@ class TestToken(TestCase):
 
         self.assertEqual(token.get_token_backend(), token_backend)
 
+    def test_token_backend_for_token_type(self):
+        test_backend = state.make_token_backend(ALGORITHM="HS512")
+        self.assertEqual(test_backend.algorithm, "HS512")
+        self.assertEqual(test_backend.signing_key, token_backend.signing_key)
+
+        class OtherToken(Token):
+            token_type = "other"
+            lifetime = timedelta(days=1)
+
+        with (
+            patch.dict(state.token_backends, {"test": test_backend}),
+            patch.dict(tokens._class_token_backends, clear=True),
+        ):
+            self.assertIs(MyToken().token_backend, test_backend)
+            self.assertIs(OtherToken().token_backend, token_backend)
+
+            # Tokens are signed and verified with the backend for their type
+            encoded = str(MyToken())
+            self.assertEqual(jwt.get_unverified_header(encoded)["alg"], "HS512")
+            MyToken(encoded)
+            UntypedToken(encoded)
+
+            # The backend is looked up once per class
+            with patch.object(state, "get_token_backend") as get_token_backend:
+                MyToken().token_backend
+                get_token_backend.assert_not_called()
+
     def test_token_user_id_claim_should_always_be_string(self):
         token = MyToken.for_user(self.user)
         self.assertIsInstance(token[api_settings.USER_ID_CLAIM], str)
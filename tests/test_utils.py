@@ -7,6 +7,7 @@ from rest_framework_simplejwt.utils import (
     aware_utcnow,
     datetime_from_epoch,
     datetime_to_epoch,
+    datetime_to_timestamp,
     format_lazy,
     make_utc,
 )
@@ -56,6 +57,29 @@ class TestDatetimeToEpoch(TestCase):
         )
 
 
+class TestDatetimeToTimestamp(TestCase):
+    def test_it_should_return_the_correct_values(self):
+        self.assertEqual(datetime_to_timestamp(datetime(year=1970, month=1, day=1)), 0)
+        self.assertEqual(
+            datetime_to_timestamp(
+                datetime(year=2000, month=1, day=1, microsecond=500000)
+            ),
+            946684800.5,
+        )
+        self.assertEqual(
+            datetime_to_timestamp(
+                datetime(
+                    year=2000,
+                    month=1,
+                    day=1,
+                    hour=1,
+                    tzinfo=timezone(timedelta(hours=1)),
+                )
+            ),
+            946684800,
+        )
+
+
 class TestDatetimeFromEpoch(TestCase):
     def test_it_should_return_the_correct_values(self):
         with self.settings(USE_TZ=False):
@@ -14,7 +14,11 @@ from rest_framework_simplejwt.utils import (
     datetime_from_epoch,
     datetime_to_epoch,
 )
-from rest_framework_simplejwt.views import TokenViewBase
+from rest_framework_simplejwt.views import (
+    TokenViewBase,
+    async_token_obtain_pair,
+    async_token_verify,
+)
 
 from .utils import APIViewTestCase, override_api_settings
 
@@ -462,6 +466,56 @@ class TestCustomTokenView(APIViewTestCase):
         self.assertEqual(res.status_code, 400)
 
 
+class TestAsyncTokenViews(APIViewTestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.username = "test_user"
+        self.password = "test_password"
+
+        self.user = User.objects.create_user(
+            username=self.username,
+            password=self.password,
+        )
+
+    async def test_obtain_pair(self):
+        request = self.factory.post(
+            "/",
+            {User.USERNAME_FIELD: self.username, "password": self.password},
+            format="json",
+        )
+        res = await async_token_obtain_pair(request)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("access", res.data)
+        self.assertIn("refresh", res.data)
+
+    async def test_credentials_wrong(self):
+        request = self.factory.post(
+            "/",
+            {User.USERNAME_FIELD: self.username, "password": "test_user"},
+            format="json",
+        )
+        res = await async_token_obtain_pair(request)
+
+        self.assertEqual(res.status_code, 401)
+        self.assertIn("detail", res.data)
+
+    async def test_verify_invalid_token(self):
+        token = AccessToken()
+        token.set_exp(lifetime=-timedelta(days=1))
+
+        request = self.factory.post("/", {"token": str(token)}, format="json")
+        res = await async_token_verify(request)
+
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(res.data["code"], "token_not_valid")
+
+    async def test_method_not_allowed(self):
+        res = await async_token_verify(self.factory.get("/"))
+
+        self.assertEqual(res.status_code, 405)
+
+
 class TestTokenViewBase(APIViewTestCase):
     def test_serializer_class_not_set_in_settings_and_class_attribute_or_wrong_path(
         self,